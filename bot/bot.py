@@ -17,11 +17,19 @@ from discord.ext import commands
 import wavelink
 
 from bot.config import Config
-from bot.music.controller import PlayerControlView, build_controller_embed
+from bot.music.controller import (
+    PlayerControlView,
+    build_controller_embed,
+    get_total_filter_pages,
+    invalidate_embed_hash,
+    invalidate_perm_cache,
+)
 from bot.storage.memory import GuildSettingsStore
+from bot.storage.settings_writer import SettingsWriter
 from bot.storage.sqlite_storage import SQLiteStorage
 from bot.utils import constants
 from bot.utils.errors import ChannelRestrictedError
+from bot.utils.helpers import notify_lavalink_node_ready
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +68,10 @@ class MusicBot(commands.Bot):
 
         # Persistent storage (SQLite)
         self.storage = SQLiteStorage(config.db_path)
+        # Gom các lần ghi settings từ nút bấm (24/7, filter) thành 1 lần ghi DB
+        self.settings_writer = SettingsWriter(self.storage)
+        # View controller persistent, 1 view cho mỗi trang filter (đăng ký trong setup_hook)
+        self.controller_views: list[PlayerControlView] = []
 
         # Cache cho allowed channels và overrides
         self.allowed_channels: dict[int, set[int]] = {}
@@ -100,6 +112,7 @@ class MusicBot(commands.Bot):
         self._using_primary_node = False
         self._primary_node_identifier: str | None = None
         self._primary_health_task: asyncio.Task[None] | None = None
+        self._db_maintenance_task: asyncio.Task[None] | None = None
 
     # --------------------------------------------------------------------------
     # Method: setup_hook
@@ -141,6 +154,8 @@ class MusicBot(commands.Bot):
         except Exception:
             logger.exception("DB maintenance failed (non-critical)")
 
+        self._start_db_maintenance()
+
         # 3. Kết nối Lavalink Node với chiến lược fallback
         await self._connect_lavalink_with_fallback()
 
@@ -151,7 +166,13 @@ class MusicBot(commands.Bot):
         await self.load_extension("bot.cogs.restrict")
 
         # 5. Restore View (để nút bấm cũ vẫn hoạt động)
-        self.add_view(PlayerControlView(self))
+        # Mỗi trang filter có custom_id select riêng -> đăng ký 1 view cho mỗi trang;
+        # nút đổi trang dùng lại đúng các view này.
+        self.controller_views = [
+            PlayerControlView(self, filter_page=page) for page in range(get_total_filter_pages())
+        ]
+        for view in self.controller_views:
+            self.add_view(view)
 
         # 6. Sync Slash Commands
         if self.config.dev_guild_id:
@@ -344,6 +365,34 @@ class MusicBot(commands.Bot):
         )
 
 
+    # --------------------------------------------------------------------------
+    # Method: _start_db_maintenance
+    # Purpose: Background task prune liked cũ + trả page trống cho OS theo chu kỳ,
+    #          thay vì VACUUM toàn bộ (khóa DB, bot đứng hình).
+    # --------------------------------------------------------------------------
+    def _start_db_maintenance(self) -> None:
+        existing_task = self._db_maintenance_task
+        if existing_task and not existing_task.done():
+            return
+
+        async def _db_maintenance_loop() -> None:
+            # prune/vacuum đi qua storage.transaction() nên xếp hàng sau lệnh ghi của người dùng
+            # (và ngược lại); prune chia lô nên mỗi lần chỉ giữ khóa ghi rất ngắn.
+            while not self.is_closed():
+                await asyncio.sleep(constants.DB_MAINTENANCE_INTERVAL)
+                try:
+                    pruned = await self.storage.prune_old_liked()
+                    if pruned > 0:
+                        logger.info("DB maintenance: pruned %d old liked tracks", pruned)
+                    await self.storage.vacuum()
+                except Exception:
+                    logger.exception("DB maintenance failed (non-critical)")
+
+        self._db_maintenance_task = asyncio.create_task(
+            _db_maintenance_loop(),
+            name="db-maintenance",
+        )
+
     # --------------------------------------------------------------------------
     # Method: on_ready
     # Purpose: Event khi bot đã đăng nhập thành công vào Discord Gateway.
@@ -448,6 +497,15 @@ class MusicBot(commands.Bot):
                 logger.exception("Failed to cancel primary health-check task")
 
         self._primary_health_task = None
+
+        maintenance_task = self._db_maintenance_task
+        if maintenance_task and not maintenance_task.done():
+            maintenance_task.cancel()
+            try:
+                await maintenance_task
+            except asyncio.CancelledError:
+                pass
+        self._db_maintenance_task = None
         
         # 2. Disconnect tất cả players để tránh orphan connections
         disconnect_count = 0
@@ -469,7 +527,8 @@ class MusicBot(commands.Bot):
         except Exception:
             logger.exception("Failed to close wavelink pool")
         
-        # 4. Đóng kết nối Database
+        # 4. Ghi nốt settings đang chờ rồi đóng kết nối Database
+        await self.settings_writer.close()
         try:
             await self.storage.close()
             logger.info("Database connection closed")
@@ -484,6 +543,7 @@ class MusicBot(commands.Bot):
     # --------------------------------------------------------------------------
     async def on_wavelink_node_ready(self, payload: wavelink.NodeReadyEventPayload) -> None:
         logger.info("Wavelink node ready: %r resumed=%s", payload.node, payload.resumed)
+        notify_lavalink_node_ready()
 
         if self._primary_node_identifier and payload.node.identifier == self._primary_node_identifier:
             self._using_primary_node = True
@@ -757,8 +817,8 @@ class MusicBot(commands.Bot):
             if maybe is not None and hasattr(maybe, "send"):
                 channel = maybe  # type: ignore[assignment]
 
-        if channel is None and hasattr(player, "home"):
-            maybe = getattr(player, "home")
+        if channel is None:
+            maybe = getattr(player, "home", None)
             if maybe is not None and hasattr(maybe, "send"):
                 channel = maybe  # type: ignore[assignment]
 
@@ -814,6 +874,9 @@ class MusicBot(commands.Bot):
             await message.edit(embed=embed, view=view)
         except discord.HTTPException:
             return
+        finally:
+            # Message vừa được edit ngoài view: nút bấm sau phải so với nội dung mới.
+            invalidate_embed_hash(message_id)
 
     async def mark_controller_message(self, guild_id: int, *, notice: str) -> None:
         ref = self.controller_messages.get(guild_id)
@@ -840,6 +903,8 @@ class MusicBot(commands.Bot):
             await message.edit(embed=embed, view=None)
         except discord.HTTPException:
             return
+        finally:
+            invalidate_embed_hash(message_id)
 
     # --------------------------------------------------------------------------
     # Event: on_wavelink_inactive_player
@@ -903,3 +968,19 @@ class MusicBot(commands.Bot):
             guild.id,
             notice="Đã rời voice channel vì không còn ai trong kênh. Dùng /play để phát lại.",
         )
+
+    # --------------------------------------------------------------------------
+    # Event: on_member_update / on_guild_role_update / on_guild_role_delete
+    # Purpose: Xóa cache quyền DJ/Admin ngay khi role thay đổi.
+    #          on_member_update cần intent members; nếu tắt thì TTL của cache vẫn lo phần còn lại.
+    # --------------------------------------------------------------------------
+    async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
+        if before.roles != after.roles:
+            invalidate_perm_cache(after.guild.id, after.id)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role) -> None:
+        if before.permissions != after.permissions:
+            invalidate_perm_cache(after.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        invalidate_perm_cache(role.guild.id)
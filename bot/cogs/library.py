@@ -145,7 +145,8 @@ class LibraryCog(commands.Cog):
             await send_response(interaction, "Lệnh này chỉ dùng trong server.", ephemeral=True)
             return
 
-        tracks = await self._storage().list_liked(interaction.guild_id, interaction.user.id)
+        # Chỉ hiển thị: đọc cột metadata, không dựng Playable từ track_json.
+        tracks = await self._storage().list_liked_rows(interaction.guild_id, interaction.user.id)
         if not tracks:
             await send_response(interaction, "Liked list đang trống.", ephemeral=True)
             return
@@ -153,7 +154,7 @@ class LibraryCog(commands.Cog):
         embed = discord.Embed(title=f"Liked Songs ({len(tracks)})")
         lines: list[str] = []
         for i, t in enumerate(tracks[:MAX_LIKED_DISPLAY], start=1):
-            lines.append(f"{i}. {t.title} ({format_ms(t.length)})")
+            lines.append(f"{i}. {t.title} ({format_ms(t.length_ms)})")
         embed.description = "\n".join(lines)
 
         if interaction.response.is_done():
@@ -261,20 +262,20 @@ class LibraryCog(commands.Cog):
             await send_response(interaction, "Key không hợp lệ: title | author", ephemeral=True)
             return
 
-        tracks = await self._storage().list_liked(interaction.guild_id, interaction.user.id)
+        tracks = await self._storage().list_liked_rows(interaction.guild_id, interaction.user.id)
         if not tracks:
             await send_response(interaction, "Liked list đang trống.", ephemeral=True)
             return
 
         if key == "title":
-            tracks.sort(key=lambda t: (t.title or "").lower())
+            tracks.sort(key=lambda t: t.title.lower())
         else:
-            tracks.sort(key=lambda t: (t.author or "").lower())
+            tracks.sort(key=lambda t: t.author.lower())
 
         embed = discord.Embed(title=f"Liked Songs (sorted by {key})")
         lines: list[str] = []
         for i, t in enumerate(tracks[:MAX_LIKED_DISPLAY], start=1):
-            lines.append(f"{i}. {t.title} ({format_ms(t.length)})")
+            lines.append(f"{i}. {t.title} ({format_ms(t.length_ms)})")
         embed.description = "\n".join(lines)
 
         if interaction.response.is_done():
@@ -415,11 +416,12 @@ class PlaylistCog(commands.GroupCog, group_name="playlist"):
                 return
 
             if isinstance(results, wavelink.Playlist):
-                added = 0
-                for t in results.tracks[:MAX_PLAYLIST_ADD]:
-                    ok = await self._storage().add_playlist_track(interaction.guild_id, interaction.user.id, name, t)
-                    if ok:
-                        added += 1
+                added = await self._storage().add_playlist_tracks(
+                    interaction.guild_id, interaction.user.id, name, results.tracks[:MAX_PLAYLIST_ADD]
+                )
+                if added is None:
+                    await send_response(interaction, "Không tìm thấy playlist.", ephemeral=True)
+                    return
 
                 _clear_playlist_cache(interaction.guild_id, interaction.user.id, name)
                 await send_response(interaction, f"Đã thêm {added} track từ playlist vào '{name}'.", ephemeral=True)
@@ -568,14 +570,10 @@ class PlaylistCog(commands.GroupCog, group_name="playlist"):
             await send_response(interaction, f"Không thể tạo playlist '{name}' (có thể đã tồn tại).", ephemeral=True)
             return
 
-        # Thêm các tracks vào playlist
-        added = 0
-        for track in tracks_to_save[:MAX_SAVE_QUEUE]:  # Giới hạn số bài tối đa
-            ok = await self._storage().add_playlist_track(
-                interaction.guild_id, interaction.user.id, name, track
-            )
-            if ok:
-                added += 1
+        # Thêm các tracks vào playlist (1 transaction)
+        added = await self._storage().add_playlist_tracks(
+            interaction.guild_id, interaction.user.id, name, tracks_to_save[:MAX_SAVE_QUEUE]  # Giới hạn số bài tối đa
+        ) or 0
 
         await send_response(
             interaction,
@@ -14,6 +14,8 @@ from discord import app_commands
 from discord.ext import commands
 import wavelink
 
+from bot.utils.helpers import is_admin
+
 
 # ------------------------------------------------------------------------------
 # Class: MetaCog
@@ -30,11 +32,7 @@ class MetaCog(commands.Cog):
             await interaction.response.send_message(content, ephemeral=ephemeral)
 
     def _is_admin(self, interaction: discord.Interaction) -> bool:
-        member = interaction.user if isinstance(interaction.user, discord.Member) else None
-        if not member:
-            return False
-        perms = member.guild_permissions
-        return perms.administrator or perms.manage_guild
+        return is_admin(interaction)
 
     @app_commands.command(name="help", description="Xem hướng dẫn sử dụng các lệnh")
     @app_commands.guild_only()
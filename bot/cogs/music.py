@@ -20,10 +20,12 @@ from discord.ext import commands
 import wavelink
 
 from bot.music.controller import (
+    FILTER_CATEGORIES,
     FILTER_PRESETS,
     PlayerControlView,
     apply_filter_preset,
     build_controller_embed,
+    preset_autocomplete,
 )
 from bot.utils.constants import (
     LYRICS_API_TIMEOUT,
@@ -43,7 +45,7 @@ from bot.utils.constants import (
     SEARCH_RATE_LIMIT_WINDOW,
 )
 from bot.utils.locks import guild_lock
-from bot.utils.helpers import ensure_lavalink_connected, is_lavalink_node_error, rebuild_player_session
+from bot.utils.helpers import ensure_lavalink_connected, is_admin, is_lavalink_node_error, rebuild_player_session
 from bot.utils.time import format_ms, parse_time_to_ms
 
 logger = logging.getLogger(__name__)
@@ -105,6 +107,12 @@ class MusicCog(commands.Cog):
     def _config(self):
         return getattr(self.bot, "config")
 
+    async def _save_settings(self, guild_id: int, settings) -> None:
+        # Mọi lần ghi settings đi qua SettingsWriter để không bị flush gom cũ ghi đè.
+        writer = getattr(self.bot, "settings_writer", None)
+        if writer is not None:
+            await writer.write_now(guild_id, settings)
+
     # --------------------------------------------------------------------------
     # Helper: _refresh_controller
     # Purpose: Gọi hàm cập nhật giao diện Player (Embed) từ Bot Core.
@@ -182,24 +190,21 @@ class MusicCog(commands.Cog):
         if not member:
             return False
 
-        if member.guild_permissions.administrator or member.guild_permissions.manage_guild:
+        if is_admin(interaction):
             return True
 
         settings = self._settings(interaction.guild_id)
         if not settings.dj_role_id:
             return True
 
-        return any(r.id == settings.dj_role_id for r in member.roles)
+        return member.get_role(settings.dj_role_id) is not None
 
     # --------------------------------------------------------------------------
     # Helper: _is_admin
     # Purpose: Kiểm tra quyền quản trị server.
     # --------------------------------------------------------------------------
     def _is_admin(self, interaction: discord.Interaction) -> bool:
-        member = _as_member(interaction.user)
-        if not member:
-            return False
-        return member.guild_permissions.administrator or member.guild_permissions.manage_guild
+        return is_admin(interaction)
 
     # --------------------------------------------------------------------------
     # Helper: _author_voice_channel
@@ -658,7 +663,7 @@ class MusicCog(commands.Cog):
                 return
 
             if interaction.channel:
-                setattr(player, "home", interaction.channel)
+                player.home = interaction.channel  # type: ignore[attr-defined]
 
             extras = {
                 "requester_id": requester.id,
@@ -771,7 +776,7 @@ class MusicCog(commands.Cog):
                 return
 
             if interaction.channel:
-                setattr(player, "home", interaction.channel)
+                player.home = interaction.channel  # type: ignore[attr-defined]
 
             extras = {
                 "requester_id": requester.id,
@@ -1355,8 +1360,7 @@ class MusicCog(commands.Cog):
             await self._send(interaction, "Lệnh này chỉ dùng trong server.", ephemeral=True)
             return
 
-        member = _as_member(interaction.user)
-        if not member or not (member.guild_permissions.administrator or member.guild_permissions.manage_guild):
+        if not self._is_admin(interaction):
             await self._send(interaction, "Bạn không có quyền dùng lệnh này.", ephemeral=True)
             return
 
@@ -1368,11 +1372,7 @@ class MusicCog(commands.Cog):
         settings = self._settings(interaction.guild_id)
         settings.stay_247 = mode == "on"
 
-        if hasattr(self.bot, "storage"):
-            try:
-                await getattr(self.bot, "storage").upsert_guild_settings(interaction.guild_id, settings)
-            except Exception:
-                logger.exception("Failed to persist stay_247 guild=%s", interaction.guild_id)
+        await self._save_settings(interaction.guild_id, settings)
 
         player = await self._get_player(interaction, connect=False)
         if player:
@@ -1386,8 +1386,7 @@ class MusicCog(commands.Cog):
             await self._send(interaction, "Lệnh này chỉ dùng trong server.", ephemeral=True)
             return
 
-        member = _as_member(interaction.user)
-        if not member or not (member.guild_permissions.administrator or member.guild_permissions.manage_guild):
+        if not self._is_admin(interaction):
             await self._send(interaction, "Bạn không có quyền dùng lệnh này.", ephemeral=True)
             return
 
@@ -1428,8 +1427,7 @@ class MusicCog(commands.Cog):
             await self._send(interaction, "Lệnh này chỉ dùng trong server.", ephemeral=True)
             return
 
-        member = _as_member(interaction.user)
-        if not member or not (member.guild_permissions.administrator or member.guild_permissions.manage_guild):
+        if not self._is_admin(interaction):
             await self._send(interaction, "Bạn không có quyền dùng lệnh này.", ephemeral=True)
             return
 
@@ -1652,21 +1650,7 @@ class MusicCog(commands.Cog):
         current: str,
     ) -> list[app_commands.Choice[str]]:
         # Autocomplete cho command /filter - lọc theo từ khóa người dùng nhập.
-        choices: list[app_commands.Choice[str]] = []
-        current_lower = current.lower()
-        
-        for name, config in FILTER_PRESETS.items():
-            if name == "reset":
-                continue  # Bỏ qua reset, đã có off
-            
-            description = config.get("description", "")
-            # Tìm theo tên hoặc mô tả
-            if current_lower in name.lower() or current_lower in description.lower():
-                label = f"{name.capitalize()} - {description}"[:100]
-                choices.append(app_commands.Choice(name=label, value=name))
-        
-        # Discord giới hạn 25 choices
-        return choices[:25]
+        return [app_commands.Choice(name=label, value=value) for label, value in preset_autocomplete(current)]
 
     @app_commands.command(name="filter", description="Chọn bộ lọc âm thanh")
     @app_commands.describe(preset="Chọn filter preset")
@@ -1678,33 +1662,12 @@ class MusicCog(commands.Cog):
     @app_commands.command(name="filters", description="Xem danh sách tất cả filter có sẵn")
     @app_commands.guild_only()
     async def filters_list(self, interaction: discord.Interaction) -> None:
-        # Hiển thị danh sách tất cả filter presets.
-        categories = {
-            "Quality": [
-                "balanced", "studio", "clarity", "presence", "warm", "bright",
-                "smooth", "basscut", "trebleboost", "tightbass", "stage",
-            ],
-            "Bass Mix": ["bassclarity", "bassvocal", "basswide", "basssmooth"],
-            "Bass": ["bassboost", "deepbass", "softbass", "megabass", "heavybass"],
-            "Pitch/Key": ["pitchup", "pitchdown", "pitchup2", "pitchdown2"],
-            "Speed/Pitch": ["nightcore", "daycore", "slowed", "superslow", "doubletime", "chipmunk", "darthvader"],
-            "Aesthetic": ["lofi", "vaporwave"],
-            "3D/Spatial": ["8d", "reverse8d", "stereowide", "mono"],
-            "Modulation": ["vibrato", "tremolo"],
-            "Vocal": ["vocal", "vocalclear", "vocalair", "karaoke"],
-            "Genre EQ": ["rock", "pop", "electronic", "cinema", "party"],
-            "Effects": ["underwater", "phone", "radio", "distorted"],
-        }
-        
+        # Hiển thị danh sách tất cả filter presets (theo FILTER_CATEGORIES dựng sẵn).
         embed = discord.Embed(title="Danh sách bộ lọc", color=0x7289DA)
         embed.description = "Dùng `/filter <tên>` hoặc lệnh riêng để bật bộ lọc.\nDùng `/resetfilter` hoặc `/filter off` để tắt."
         
-        for cat_name, filter_names in categories.items():
-            values = []
-            for name in filter_names:
-                if name in FILTER_PRESETS:
-                    desc = FILTER_PRESETS[name].get("description", "")
-                    values.append(f"`{name}` - {desc}")
+        for cat_name, filter_names in FILTER_CATEGORIES.items():
+            values = [f"`{name}` - {FILTER_PRESETS[name].get('description', '')}" for name in filter_names]
             if values:
                 embed.add_field(name=cat_name, value="\n".join(values), inline=False)
         
@@ -2134,8 +2097,7 @@ class MusicCog(commands.Cog):
             keep: list[wavelink.Playable] = []
             removed = 0
             for t in upcoming:
-                extras = dict(t.extras)
-                rid = extras.get("requester_id")
+                rid = getattr(t.extras, "requester_id", None)
                 if rid is None:
                     keep.append(t)
                     continue
@@ -2181,11 +2143,7 @@ class MusicCog(commands.Cog):
         if action == "clear":
             settings.dj_role_id = None
 
-            if hasattr(self.bot, "storage"):
-                try:
-                    await getattr(self.bot, "storage").upsert_guild_settings(interaction.guild_id, settings)
-                except Exception:
-                    logger.exception("Failed to persist dj_role_id guild=%s", interaction.guild_id)
+            await self._save_settings(interaction.guild_id, settings)
 
             await self._send(interaction, "Đã clear DJ role.")
             return
@@ -2196,11 +2154,7 @@ class MusicCog(commands.Cog):
 
         settings.dj_role_id = role.id
 
-        if hasattr(self.bot, "storage"):
-            try:
-                await getattr(self.bot, "storage").upsert_guild_settings(interaction.guild_id, settings)
-            except Exception:
-                logger.exception("Failed to persist dj_role_id guild=%s", interaction.guild_id)
+        await self._save_settings(interaction.guild_id, settings)
 
         await self._send(interaction, f"Đã set DJ role = {role.mention}.")
 
@@ -2235,11 +2189,7 @@ class MusicCog(commands.Cog):
             if interaction.channel_id is not None:
                 settings.announce_channel_id = interaction.channel_id
 
-        if hasattr(self.bot, "storage"):
-            try:
-                await getattr(self.bot, "storage").upsert_guild_settings(interaction.guild_id, settings)
-            except Exception:
-                logger.exception("Failed to persist announce settings guild=%s", interaction.guild_id)
+        await self._save_settings(interaction.guild_id, settings)
 
         await self._send(interaction, f"Announce = {mode}.")
 
@@ -2263,11 +2213,7 @@ class MusicCog(commands.Cog):
         settings = self._settings(interaction.guild_id)
         settings.buttons_enabled = mode == "on"
 
-        if hasattr(self.bot, "storage"):
-            try:
-                await getattr(self.bot, "storage").upsert_guild_settings(interaction.guild_id, settings)
-            except Exception:
-                logger.exception("Failed to persist buttons_enabled guild=%s", interaction.guild_id)
+        await self._save_settings(interaction.guild_id, settings)
 
         player = await self._get_player(interaction, connect=False)
         if player:
@@ -6,13 +6,34 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
 import json
 import os
-from urllib.parse import urlparse
+import re
+from types import MappingProxyType
 
 from dotenv import load_dotenv
 
+try:
+    # orjson là tùy chọn (pip install .[speed]); lỗi parse của nó kế thừa json.JSONDecodeError.
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+# Đánh dấu đã load .env trong process này để tránh parse lại file mỗi lần load_config.
+_DOTENV_LOADED = False
+
+# Config đã parse gần nhất (load_config trả lại ngay nếu không yêu cầu reload).
+_CACHE: Config | None = None
+
+# URI node Lavalink chỉ gồm scheme://host[:port], không cần urlparse tổng quát.
+_URI_RE = re.compile(r"(?i)([a-z][a-z0-9+.-]*)://(\[[^\]]+\]|[^:/\s]+)(?::(\d{1,5}))?/?")
+
+# Scheme hợp lệ cho node Lavalink + port mặc định tương ứng.
+_DEFAULT_PORTS: dict[str, int] = {"http": 80, "https": 443}
+_VALID_SCHEMES: frozenset[str] = frozenset(_DEFAULT_PORTS)
 
 _ERR_LAVALINK_NODES_JSON_INVALID = (
     "LAVALINK_NODES_JSON không hợp lệ. Giá trị phải là JSON array. "
@@ -24,8 +45,8 @@ _ERR_LAVALINK_NODES_JSON_INVALID = (
 # Helper: _get_bool
 # Purpose: Chuyển đổi giá trị string từ env thành boolean an toàn.
 # ------------------------------------------------------------------------------
-def _get_bool(name: str, default: bool = False) -> bool:
-    raw = os.getenv(name)
+def _get_bool(env: Mapping[str, str], name: str, default: bool = False) -> bool:
+    raw = env.get(name)
     if raw is None:
         return default
     return raw.strip().lower() in {"1", "true", "yes", "y", "on"}
@@ -51,43 +72,52 @@ def _coerce_bool(raw: object, *, field_name: str) -> bool:
 # Helper: _get_int
 # Purpose: Chuyển đổi giá trị string từ env thành int, có giá trị mặc định.
 # ------------------------------------------------------------------------------
-def _get_int(name: str, default: int) -> int:
-    raw = os.getenv(name)
-    if raw is None or not raw.strip():
+def _get_int(env: Mapping[str, str], name: str, default: int) -> int:
+    raw = env.get(name)
+    if raw is None:
         return default
-    return int(raw)
+    # Strip 1 lần rồi parse base 10 cố định (env int luôn là số thập phân).
+    s = raw.strip()
+    return int(s, 10) if s else default
 
 
 # ------------------------------------------------------------------------------
 # Helper: _get_optional_int
 # Purpose: Chuyển đổi thành int nhưng cho phép trả về None nếu không có giá trị.
 # ------------------------------------------------------------------------------
-def _get_optional_int(name: str) -> int | None:
-    raw = os.getenv(name)
-    if raw is None or not raw.strip():
+def _get_optional_int(env: Mapping[str, str], name: str) -> int | None:
+    raw = env.get(name)
+    if raw is None:
         return None
-    return int(raw)
+    # Strip 1 lần rồi parse base 10 cố định (env int luôn là số thập phân).
+    s = raw.strip()
+    return int(s, 10) if s else None
 
 
 # ------------------------------------------------------------------------------
 # Class: Config
 # Purpose: Dataclass chứa toàn bộ thông tin cấu hình (immutable).
 # ------------------------------------------------------------------------------
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LavalinkNodeConfig:
     identifier: str
     host: str
     port: int
     password: str
     secure: bool
+    # uri không đổi (frozen) nên tính 1 lần lúc khởi tạo thay vì format lại mỗi lần đọc.
+    _uri: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        scheme = "https" if self.secure else "http"
+        object.__setattr__(self, "_uri", f"{scheme}://{self.host}:{self.port}")
 
     @property
     def uri(self) -> str:
-        scheme = "https" if self.secure else "http"
-        return f"{scheme}://{self.host}:{self.port}"
+        return self._uri
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Config:
     discord_token: str
 
@@ -116,11 +146,25 @@ class Config:
     log_file: str
     log_max_bytes: int
     log_backup_count: int
+    log_buffer_capacity: int
 
     # Cấu hình Meta
     support_invite_url: str | None
     vote_url: str | None
 
+    # Index node theo identifier (read-only), dựng 1 lần khi tạo Config.
+    nodes_by_id: Mapping[str, LavalinkNodeConfig] = field(init=False, repr=False, compare=False)
+    # Đường dẫn tuyệt đối tới file log, tính 1 lần khi tạo Config.
+    log_path: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "nodes_by_id",
+            MappingProxyType({n.identifier: n for n in self.lavalink_nodes}),
+        )
+        object.__setattr__(self, "log_path", os.path.abspath(os.path.join(self.log_dir, self.log_file)))
+
     @property
     def lavalink_uri(self) -> str:
         return self.lavalink_nodes[0].uri
@@ -146,16 +190,127 @@ class Config:
         return self.lavalink_nodes[0].port
 
 
+# ------------------------------------------------------------------------------
+# Helper: _node_from_json
+# Purpose: Validate + chuẩn hóa 1 phần tử của LAVALINK_NODES_JSON thành node config.
+#          Gom toàn bộ kiểm tra kiểu/giá trị vào 1 chỗ, vòng lặp chỉ còn lo trùng identifier.
+# ------------------------------------------------------------------------------
+def _node_from_json(i: int, item: object) -> LavalinkNodeConfig:
+    if not isinstance(item, dict):
+        raise ValueError(f"LAVALINK_NODES_JSON[{i}] phải là object")
+
+    # Chỉ build tên mặc định khi thật sự thiếu identifier.
+    raw_identifier = item.get("identifier") or item.get("id")
+    identifier = (str(raw_identifier).strip() if raw_identifier else "") or f"fallback{i}"
+
+    password = str(item.get("password") or "").strip()
+    if not password:
+        raise ValueError(f"Thiếu password cho node {identifier!r} trong LAVALINK_NODES_JSON")
+
+    # Ưu tiên đọc uri nếu có (đỡ phải tách host/port/secure).
+    host = str(item.get("host") or "").strip()
+    port_raw = item.get("port")
+    secure_raw = item.get("secure")
+
+    uri_raw = item.get("uri") or item.get("url")
+    if uri_raw:
+        m = _URI_RE.fullmatch(str(uri_raw).strip())
+        if m is None:
+            raise ValueError(
+                f"Node {identifier!r} có uri không hợp lệ: {uri_raw!r} (chỉ hỗ trợ http(s)://host[:port])"
+            )
+        scheme, host, port_s = m.groups()
+        scheme = scheme.lower()
+        if scheme not in _VALID_SCHEMES:
+            raise ValueError(
+                f"Node {identifier!r} có uri không hợp lệ: scheme {scheme!r} không được hỗ trợ (chỉ http/https)"
+            )
+        secure = scheme == "https"
+        port = int(port_s) if port_s else _DEFAULT_PORTS[scheme]
+    else:
+        secure = _coerce_bool(secure_raw, field_name=f"{identifier}.secure") if secure_raw is not None else False
+        try:
+            port = int(port_raw) if port_raw is not None else 0
+        except Exception as e:
+            raise ValueError(f"Port không hợp lệ cho node {identifier!r}: {port_raw!r}") from e
+
+    if not host:
+        raise ValueError(f"Thiếu host/uri cho node {identifier!r} trong LAVALINK_NODES_JSON")
+    if not (1 <= port <= 65535):
+        raise ValueError(f"Port không hợp lệ cho node {identifier!r}: {port}")
+
+    return LavalinkNodeConfig(
+        identifier=identifier,
+        host=host,
+        port=port,
+        password=password,
+        secure=secure,
+    )
+
+
+# ------------------------------------------------------------------------------
+# Helper: _first_duplicate
+# Purpose: Tìm identifier trùng đầu tiên (tính cả reserved). Chỉ gọi ở nhánh lỗi,
+#          nhánh hợp lệ đã được loại trừ bằng so sánh kích thước set.
+# ------------------------------------------------------------------------------
+def _first_duplicate(identifiers: list[str], reserved: set[str]) -> str:
+    seen = set(reserved)
+    for identifier in identifiers:
+        if identifier in seen:
+            return identifier
+        seen.add(identifier)
+    raise AssertionError("unreachable: không tìm thấy identifier trùng")
+
+
+# ------------------------------------------------------------------------------
+# Helper: _parse_nodes_json
+# Purpose: Parse toàn bộ LAVALINK_NODES_JSON thành tuple node config.
+#          reserved: các identifier đã dùng (VD primary node) không được trùng.
+# ------------------------------------------------------------------------------
+def _parse_nodes_json(raw: str, *, reserved: Iterable[str] = ()) -> tuple[LavalinkNodeConfig, ...]:
+    try:
+        data = _json_loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(_ERR_LAVALINK_NODES_JSON_INVALID) from e
+
+    if not isinstance(data, list) or not data:
+        raise ValueError("LAVALINK_NODES_JSON phải là JSON array không rỗng")
+
+    nodes = tuple(_node_from_json(i, item) for i, item in enumerate(data, start=1))
+
+    # Nhánh thường gặp (không trùng): chỉ dựng set 1 lần rồi so kích thước.
+    identifiers = [n.identifier for n in nodes]
+    unique = set(identifiers)
+    reserved_set = set(reserved)
+    if len(unique) != len(identifiers) or not unique.isdisjoint(reserved_set):
+        dup = _first_duplicate(identifiers, reserved_set)
+        raise ValueError(f"Trùng identifier trong LAVALINK_NODES_JSON: {dup!r}")
+    return nodes
+
+
 # ------------------------------------------------------------------------------
 # Function: load_config
 # Purpose: Đọc file .env và validate các giá trị bắt buộc.
 #          Trả về đối tượng Config hoàn chỉnh.
 # ------------------------------------------------------------------------------
-def load_config() -> Config:
-    load_dotenv(override=False)
+def load_config(*, reload: bool = False) -> Config:
+    # Config đã parse được giữ lại cho cả process; reload=True để đọc lại env (VD khi SIGHUP).
+    global _CACHE, _DOTENV_LOADED
+
+    if _CACHE is not None and not reload:
+        return _CACHE
+
+    # .env chỉ cần đọc 1 lần cho mỗi process (override=False nên lần sau cũng không đổi gì).
+    # BOT_SKIP_DOTENV=1: env đã được inject sẵn (Docker/systemd) -> bỏ qua việc đọc file.
+    if not _DOTENV_LOADED and not _get_bool(os.environ, "BOT_SKIP_DOTENV", False):
+        load_dotenv(override=False)
+        _DOTENV_LOADED = True
+
+    # Chụp env 1 lần thành dict thường; mọi lookup bên dưới đọc từ bản chụp này.
+    env = dict(os.environ)
 
     # 1. Discord Token (Bắt buộc)
-    discord_token = os.getenv("DISCORD_TOKEN", "").strip()
+    discord_token = env.get("DISCORD_TOKEN", "").strip()
     if not discord_token:
         raise ValueError("Missing DISCORD_TOKEN in environment")
 
@@ -167,13 +322,13 @@ def load_config() -> Config:
 
     # 2a. Load primary node từ LAVALINK_HOST/PORT/... (nếu có)
     primary_node: LavalinkNodeConfig | None = None
-    lavalink_host = os.getenv("LAVALINK_HOST", "").strip()
-    lavalink_password = os.getenv("LAVALINK_PASSWORD", "").strip()
+    lavalink_host = env.get("LAVALINK_HOST", "").strip()
+    lavalink_password = env.get("LAVALINK_PASSWORD", "").strip()
 
     if lavalink_host and lavalink_password:
-        lavalink_port = _get_int("LAVALINK_PORT", 2333)
-        lavalink_secure = _get_bool("LAVALINK_SECURE", False)
-        lavalink_identifier = os.getenv("LAVALINK_IDENTIFIER", "primary").strip() or "primary"
+        lavalink_port = _get_int(env, "LAVALINK_PORT", 2333)
+        lavalink_secure = _get_bool(env, "LAVALINK_SECURE", False)
+        lavalink_identifier = env.get("LAVALINK_IDENTIFIER", "primary").strip() or "primary"
 
         primary_node = LavalinkNodeConfig(
             identifier=lavalink_identifier,
@@ -184,77 +339,13 @@ def load_config() -> Config:
         )
 
     # 2b. Load fallback nodes từ LAVALINK_NODES_JSON (nếu có)
-    fallback_nodes: list[LavalinkNodeConfig] = []
-    raw_nodes_json = os.getenv("LAVALINK_NODES_JSON")
-    raw_nodes_json = raw_nodes_json.strip() if raw_nodes_json and raw_nodes_json.strip() else ""
+    fallback_nodes: tuple[LavalinkNodeConfig, ...] = ()
+    raw_nodes_json = (env.get("LAVALINK_NODES_JSON") or "").strip()
 
     if raw_nodes_json:
-        try:
-            data = json.loads(raw_nodes_json)
-        except json.JSONDecodeError as e:
-            raise ValueError(_ERR_LAVALINK_NODES_JSON_INVALID) from e
-
-        if not isinstance(data, list) or not data:
-            raise ValueError("LAVALINK_NODES_JSON phải là JSON array không rỗng")
-
-        seen: set[str] = set()
-        # Nếu có primary node, thêm identifier vào seen để tránh trùng
-        if primary_node:
-            seen.add(primary_node.identifier)
-
-        for i, item in enumerate(data, start=1):
-            if not isinstance(item, dict):
-                raise ValueError(f"LAVALINK_NODES_JSON[{i}] phải là object")
-
-            identifier = str(item.get("identifier") or item.get("id") or f"fallback{i}").strip()
-            if not identifier:
-                identifier = f"fallback{i}"
-
-            if identifier in seen:
-                raise ValueError(f"Trùng identifier trong LAVALINK_NODES_JSON: {identifier!r}")
-            seen.add(identifier)
-
-            password = str(item.get("password") or "").strip()
-            if not password:
-                raise ValueError(f"Thiếu password cho node {identifier!r} trong LAVALINK_NODES_JSON")
-
-            # Ưu tiên đọc uri nếu có (đỡ phải tách host/port/secure).
-            host = str(item.get("host") or "").strip()
-            port_raw = item.get("port")
-            secure_raw = item.get("secure")
-
-            uri_raw = item.get("uri") or item.get("url")
-            if uri_raw:
-                u = urlparse(str(uri_raw).strip())
-                scheme = (u.scheme or "").lower()
-                if scheme not in {"http", "https"}:
-                    raise ValueError(
-                        f"Node {identifier!r} có uri scheme không hợp lệ: {scheme!r} (chỉ hỗ trợ http/https)"
-                    )
-                secure = scheme == "https"
-                host = u.hostname or ""
-                port = u.port or (443 if secure else 80)
-            else:
-                secure = _coerce_bool(secure_raw, field_name=f"{identifier}.secure") if secure_raw is not None else False
-                try:
-                    port = int(port_raw) if port_raw is not None else 0
-                except Exception as e:
-                    raise ValueError(f"Port không hợp lệ cho node {identifier!r}: {port_raw!r}") from e
-
-            if not host:
-                raise ValueError(f"Thiếu host/uri cho node {identifier!r} trong LAVALINK_NODES_JSON")
-            if not (1 <= port <= 65535):
-                raise ValueError(f"Port không hợp lệ cho node {identifier!r}: {port}")
-
-            fallback_nodes.append(
-                LavalinkNodeConfig(
-                    identifier=identifier,
-                    host=host,
-                    port=port,
-                    password=password,
-                    secure=secure,
-                )
-            )
+        # Nếu có primary node, giữ chỗ identifier của nó để tránh trùng
+        reserved = (primary_node.identifier,) if primary_node else ()
+        fallback_nodes = _parse_nodes_json(raw_nodes_json, reserved=reserved)
 
     # 2c. Validate: phải có ít nhất 1 node (primary hoặc fallback)
     if not primary_node and not fallback_nodes:
@@ -265,60 +356,56 @@ def load_config() -> Config:
         )
 
     # 2d. Tạo danh sách tất cả nodes (primary đứng đầu để backward compatible)
-    all_nodes: list[LavalinkNodeConfig] = []
-    if primary_node:
-        all_nodes.append(primary_node)
-    all_nodes.extend(fallback_nodes)
+    all_nodes = (primary_node, *fallback_nodes) if primary_node else fallback_nodes
 
-    raw_cache = os.getenv("WAVELINK_CACHE_CAPACITY")
-    wavelink_cache_capacity = int(raw_cache) if raw_cache and raw_cache.strip() else None
+    wavelink_cache_capacity = _get_optional_int(env, "WAVELINK_CACHE_CAPACITY")
 
     # Số lần retry khi node Lavalink không kết nối được.
     # Public node hay chết; nếu để None (mặc định của wavelink) có thể treo startup rất lâu.
-    lavalink_node_retries = _get_int("LAVALINK_NODE_RETRIES", 2)
+    lavalink_node_retries = _get_int(env, "LAVALINK_NODE_RETRIES", 2)
     if lavalink_node_retries < 0:
         raise ValueError("LAVALINK_NODE_RETRIES must be >= 0")
 
     # Thời gian (giây) kiểm tra lại primary node để chuyển về khi ổn định
     # Mặc định 120 giây (2 phút). Set 0 để tắt tính năng này.
-    lavalink_primary_health_interval = _get_int("LAVALINK_PRIMARY_HEALTH_INTERVAL", 120)
+    lavalink_primary_health_interval = _get_int(env, "LAVALINK_PRIMARY_HEALTH_INTERVAL", 120)
     if lavalink_primary_health_interval < 0:
         raise ValueError("LAVALINK_PRIMARY_HEALTH_INTERVAL must be >= 0")
 
     # 3. Bot General Config
-    dev_guild_id = _get_optional_int("DEV_GUILD_ID")
+    dev_guild_id = _get_optional_int(env, "DEV_GUILD_ID")
 
-    default_volume = _get_int("DEFAULT_VOLUME", 30)
+    default_volume = _get_int(env, "DEFAULT_VOLUME", 30)
     if not 0 <= default_volume <= 100:
         raise ValueError("DEFAULT_VOLUME must be between 0 and 100")
 
-    idle_timeout_seconds = _get_int("IDLE_TIMEOUT_SECONDS", 300)
+    idle_timeout_seconds = _get_int(env, "IDLE_TIMEOUT_SECONDS", 300)
     if idle_timeout_seconds < 0:
         raise ValueError("IDLE_TIMEOUT_SECONDS must be >= 0")
 
-    announce_nowplaying = _get_bool("ANNOUNCE_NOWPLAYING", False)
+    announce_nowplaying = _get_bool(env, "ANNOUNCE_NOWPLAYING", False)
 
-    db_path = os.getenv("DB_PATH", "bot.db").strip() or "bot.db"
+    db_path = env.get("DB_PATH", "bot.db").strip() or "bot.db"
 
     # 4. Logging Config
-    log_level = os.getenv("LOG_LEVEL", "INFO").strip() or "INFO"
-    log_dir = os.getenv("LOG_DIR", "logs").strip() or "logs"
-    log_file = os.getenv("LOG_FILE", "bot.log").strip() or "bot.log"
-    log_max_bytes = _get_int("LOG_MAX_BYTES", 5 * 1024 * 1024)
-    log_backup_count = _get_int("LOG_BACKUP_COUNT", 5)
+    log_level = env.get("LOG_LEVEL", "INFO").strip() or "INFO"
+    log_dir = env.get("LOG_DIR", "logs").strip() or "logs"
+    log_file = env.get("LOG_FILE", "bot.log").strip() or "bot.log"
+    log_max_bytes = _get_int(env, "LOG_MAX_BYTES", 5 * 1024 * 1024)
+    log_backup_count = _get_int(env, "LOG_BACKUP_COUNT", 5)
+    log_buffer_capacity = _get_int(env, "LOG_BUFFER_CAPACITY", 64)
+    if log_buffer_capacity < 0:
+        raise ValueError("LOG_BUFFER_CAPACITY must be >= 0")
 
     # 5. External Links
-    support_invite_url = os.getenv("SUPPORT_INVITE_URL")
-    support_invite_url = support_invite_url.strip() if support_invite_url and support_invite_url.strip() else None
-
-    vote_url = os.getenv("VOTE_URL")
-    vote_url = vote_url.strip() if vote_url and vote_url.strip() else None
+    support_invite_url = (env.get("SUPPORT_INVITE_URL") or "").strip() or None
+    vote_url = (env.get("VOTE_URL") or "").strip() or None
 
-    return Config(
+    config = Config(
         discord_token=discord_token,
         primary_lavalink_node=primary_node,
-        fallback_lavalink_nodes=tuple(fallback_nodes),
-        lavalink_nodes=tuple(all_nodes),
+        fallback_lavalink_nodes=fallback_nodes,
+        lavalink_nodes=all_nodes,
         wavelink_cache_capacity=wavelink_cache_capacity,
         lavalink_node_retries=lavalink_node_retries,
         lavalink_primary_health_interval=lavalink_primary_health_interval,
@@ -332,6 +419,9 @@ def load_config() -> Config:
         log_file=log_file,
         log_max_bytes=log_max_bytes,
         log_backup_count=log_backup_count,
+        log_buffer_capacity=log_buffer_capacity,
         support_invite_url=support_invite_url,
         vote_url=vote_url,
     )
+    _CACHE = config
+    return config
@@ -7,32 +7,63 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import functools
+from itertools import islice
 import logging
+import time
 from typing import Any, cast
 
 import discord
 from discord.ext import commands
 import wavelink
 
-from bot.utils.constants import PLAYER_OP_TIMEOUT
+from bot.utils.constants import (
+    CONTROLLER_EDIT_DEBOUNCE,
+    PERM_CACHE_TTL_SECONDS,
+    PLAYER_OP_TIMEOUT,
+    SEEK_STEP_MS,
+    VOLUME_MAX,
+    VOLUME_MIN,
+    VOLUME_STEP,
+)
 from bot.utils.helpers import rebuild_player_session
-from bot.utils.locks import guild_lock
+from bot.utils.locks import try_guild_lock
 from bot.utils.time import format_ms
 
 
 logger = logging.getLogger(__name__)
 
 
+# Text hiển thị cho từng trạng thái Loop/Autoplay (hằng số, không dựng lại mỗi lần render).
+_QUEUE_MODE_TEXT: dict[wavelink.QueueMode, str] = {
+    wavelink.QueueMode.normal: "Tắt",
+    wavelink.QueueMode.loop: "Bài hiện tại",
+    wavelink.QueueMode.loop_all: "Toàn bộ",
+}
+
+# Vòng chuyển chế độ Loop khi bấm nút: Tắt -> Bài hiện tại -> Toàn bộ -> Tắt.
+_NEXT_QUEUE_MODE: dict[wavelink.QueueMode, wavelink.QueueMode] = {
+    wavelink.QueueMode.normal: wavelink.QueueMode.loop,
+    wavelink.QueueMode.loop: wavelink.QueueMode.loop_all,
+    wavelink.QueueMode.loop_all: wavelink.QueueMode.normal,
+}
+
+# partial = chỉ tự phát bài kế tiếp trong queue, không gợi ý thêm bài
+_AUTOPLAY_TEXT: dict[wavelink.AutoPlayMode, str] = {
+    wavelink.AutoPlayMode.enabled: "Bật",
+    wavelink.AutoPlayMode.partial: "Tắt",
+    wavelink.AutoPlayMode.disabled: "Tắt",
+}
+
+
 # ------------------------------------------------------------------------------
 # Helper: _queue_mode_text
 # Purpose: Chuyển đổi trạng thái Loop thành text hiển thị.
 # ------------------------------------------------------------------------------
 def _queue_mode_text(mode: wavelink.QueueMode) -> str:
-    return {
-        wavelink.QueueMode.normal: "Tắt",
-        wavelink.QueueMode.loop: "Bài hiện tại",
-        wavelink.QueueMode.loop_all: "Toàn bộ",
-    }.get(mode, "Tắt")
+    return _QUEUE_MODE_TEXT.get(mode, "Tắt")
 
 
 # ------------------------------------------------------------------------------
@@ -40,12 +71,7 @@ def _queue_mode_text(mode: wavelink.QueueMode) -> str:
 # Purpose: Chuyển đổi trạng thái Autoplay thành text hiển thị.
 # ------------------------------------------------------------------------------
 def _autoplay_text(mode: wavelink.AutoPlayMode) -> str:
-    # partial = chỉ tự phát bài kế tiếp trong queue, không gợi ý thêm bài
-    return {
-        wavelink.AutoPlayMode.enabled: "Bật",
-        wavelink.AutoPlayMode.partial: "Tắt",
-        wavelink.AutoPlayMode.disabled: "Tắt",
-    }.get(mode, "Tắt")
+    return _AUTOPLAY_TEXT.get(mode, "Tắt")
 
 
 # ------------------------------------------------------------------------------
@@ -58,6 +84,22 @@ def _filters_preset_text(value: str | None) -> str:
     return value
 
 
+# Khung tĩnh của embed điều khiển (title + footer), mỗi lần render chỉ copy rồi thêm field.
+_CONTROLLER_TEMPLATE = discord.Embed(title="Trình phát nhạc")
+_CONTROLLER_TEMPLATE.set_footer(text="Dùng các nút bên dưới để điều khiển")
+
+# Tên các field trong embed điều khiển.
+_FIELD_STATUS = "Trạng thái"
+_FIELD_REQUESTER = "Người yêu cầu"
+_FIELD_TIME = "Thời gian"
+_FIELD_VOLUME = "Âm lượng"
+_FIELD_LOOP = "Lặp lại"
+_FIELD_AUTOPLAY = "Tự động phát"
+_FIELD_QUEUE = "Hàng đợi"
+_FIELD_247 = "Chế độ 24/7"
+_FIELD_FILTER = "Bộ lọc"
+
+
 # ------------------------------------------------------------------------------
 # Function: build_controller_embed
 # Purpose: Tạo Embed chứa thông tin bài hát đang phát, thanh thời gian, và các trạng thái.
@@ -69,13 +111,43 @@ def build_controller_embed(
     notice: str | None = None,
 ) -> discord.Embed:
     guild_id = player.guild.id if player.guild else None
-    settings = getattr(bot, "settings").get(guild_id) if guild_id else None
+    settings = bot.settings.get(guild_id) if guild_id else None  # type: ignore[attr-defined]
 
+    # Đọc các thuộc tính 1 lần, dùng chung cho cache key và phần render.
     current = player.current
-    embed = discord.Embed(title="Trình phát nhạc")
+    position = player.position
+    volume = player.volume
+    queue_mode = player.queue.mode
+    autoplay = player.autoplay
+    queue_len = len(player.queue)
+    stay_247 = settings.stay_247 if settings is not None else None
+    filters_preset = getattr(settings, "filters_preset", None)
+
+    # extras là ExtrasNamespace: đọc thẳng 1 attribute, không copy toàn bộ sang dict.
+    requester_name = getattr(current.extras, "requester_name", None) if current else None
+
+    # Không có gì hiển thị thay đổi (cùng bài, cùng giây, cùng trạng thái) -> dùng lại embed cũ.
+    # Cache gắn trên player nên tự mất khi player bị huỷ.
+    cache_key = (
+        current.encoded if current else None,
+        requester_name,
+        position // 1000 if current else None,
+        volume,
+        queue_mode,
+        autoplay,
+        queue_len,
+        stay_247,
+        filters_preset,
+        notice,
+    )
+    cached = getattr(player, "_controller_embed_cache", None)
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+
+    embed = _CONTROLLER_TEMPLATE.copy()
 
     if notice:
-        embed.add_field(name="Trạng thái", value=notice, inline=False)
+        embed.add_field(name=_FIELD_STATUS, value=notice, inline=False)
 
     if current:
         title = current.title
@@ -84,39 +156,84 @@ def build_controller_embed(
         else:
             embed.description = f"{title}\n{current.author}"
 
-        extras = dict(current.extras)
-        requester_name = extras.get("requester_name")
         if requester_name:
-            embed.add_field(name="Người yêu cầu", value=str(requester_name), inline=True)
+            embed.add_field(name=_FIELD_REQUESTER, value=str(requester_name), inline=True)
 
-        embed.add_field(
-            name="Thời gian",
-            value=f"{format_ms(player.position)} / {format_ms(current.length)}",
-            inline=True,
-        )
+        # Độ dài bài không đổi: format 1 lần rồi gắn lên track (giống player.home).
+        length_text = getattr(current, "_length_text", None)
+        if length_text is None:
+            length_text = format_ms(current.length)
+            current._length_text = length_text  # type: ignore[attr-defined]
+
+        embed.add_field(name=_FIELD_TIME, value=f"{format_ms(position)} / {length_text}", inline=True)
     else:
         embed.description = "Không có bài đang phát."
 
-    embed.add_field(name="Âm lượng", value=str(player.volume), inline=True)
-    embed.add_field(name="Lặp lại", value=_queue_mode_text(player.queue.mode), inline=True)
-    embed.add_field(name="Tự động phát", value=_autoplay_text(player.autoplay), inline=True)
-    embed.add_field(name="Hàng đợi", value=str(len(player.queue)), inline=True)
+    embed.add_field(name=_FIELD_VOLUME, value=str(volume), inline=True)
+    embed.add_field(name=_FIELD_LOOP, value=_queue_mode_text(queue_mode), inline=True)
+    embed.add_field(name=_FIELD_AUTOPLAY, value=_autoplay_text(autoplay), inline=True)
+    embed.add_field(name=_FIELD_QUEUE, value=str(queue_len), inline=True)
 
     if settings is not None:
-        embed.add_field(name="Chế độ 24/7", value="Bật" if settings.stay_247 else "Tắt", inline=True)
-        embed.add_field(
-            name="Bộ lọc",
-            value=_filters_preset_text(getattr(settings, "filters_preset", None)),
-            inline=True,
-        )
+        embed.add_field(name=_FIELD_247, value="Bật" if stay_247 else "Tắt", inline=True)
+        embed.add_field(name=_FIELD_FILTER, value=_filters_preset_text(filters_preset), inline=True)
 
-    embed.set_footer(text="Dùng các nút bên dưới để điều khiển")
+    player._controller_embed_cache = (cache_key, embed)  # type: ignore[attr-defined]
     return embed
 
 
 # ------------------------------------------------------------------------------
 # Helpers: Permission Checks & Utils
 # ------------------------------------------------------------------------------
+
+# Cache kết quả kiểm tra quyền: {(guild_id, user_id, kind, dj_role_id): (result, timestamp)}
+# dj_role_id nằm trong key nên đổi DJ role là tự miss cache.
+_PERM_CACHE: dict[tuple[int, int, str, int | None], tuple[bool, float]] = {}
+_PERM_CACHE_MAX = 4096
+
+# Administrator hoặc Manage Server: kiểm tra bằng 1 phép AND trên bitfield.
+# guild_permissions tính lại từ roles mỗi lần truy cập, nên chỉ đọc 1 lần.
+_ADMIN_PERMS_MASK = discord.Permissions.administrator.flag | discord.Permissions.manage_guild.flag
+
+
+def _get_cached_perm(key: tuple[int, int, str, int | None]) -> bool | None:
+    # Lấy kết quả kiểm tra quyền từ cache nếu còn hợp lệ.
+    cached = _PERM_CACHE.get(key)
+    if cached is None:
+        return None
+    result, timestamp = cached
+    if time.monotonic() - timestamp < PERM_CACHE_TTL_SECONDS:
+        return result
+    # Cache hết hạn, xóa đi
+    del _PERM_CACHE[key]
+    return None
+
+
+def _set_cached_perm(key: tuple[int, int, str, int | None], result: bool) -> None:
+    # Lưu kết quả kiểm tra quyền vào cache.
+    now = time.monotonic()
+    _PERM_CACHE.pop(key, None)
+    if len(_PERM_CACHE) >= _PERM_CACHE_MAX:
+        # Key luôn được chèn lại ở cuối nên đầu dict là entry cũ nhất: bỏ các entry hết hạn ở đầu,
+        # nếu vẫn đầy (mọi entry còn hạn) thì bỏ tiếp entry cũ nhất (FIFO) cho tới dưới giới hạn.
+        while _PERM_CACHE:
+            oldest = next(iter(_PERM_CACHE))
+            if len(_PERM_CACHE) < _PERM_CACHE_MAX and now - _PERM_CACHE[oldest][1] < PERM_CACHE_TTL_SECONDS:
+                break
+            del _PERM_CACHE[oldest]
+    _PERM_CACHE[key] = (result, now)
+
+
+# ------------------------------------------------------------------------------
+# Function: invalidate_perm_cache
+# Purpose: Xóa cache quyền ngay khi role/member thay đổi (gọi từ event listener).
+#          user_id=None: xóa toàn bộ entry của guild (VD role bị sửa/xóa).
+# ------------------------------------------------------------------------------
+def invalidate_perm_cache(guild_id: int, user_id: int | None = None) -> None:
+    for key in [k for k in _PERM_CACHE if k[0] == guild_id and (user_id is None or k[1] == user_id)]:
+        del _PERM_CACHE[key]
+
+
 def _is_dj_or_admin(bot: commands.Bot, interaction: discord.Interaction) -> bool:
     if not interaction.guild_id:
         return False
@@ -125,30 +242,36 @@ def _is_dj_or_admin(bot: commands.Bot, interaction: discord.Interaction) -> bool
     if not member:
         return False
 
-    if member.guild_permissions.administrator or member.guild_permissions.manage_guild:
-        return True
+    settings = bot.settings.get(interaction.guild_id)  # type: ignore[attr-defined]
+    key = (interaction.guild_id, member.id, "dj", settings.dj_role_id)
+    cached = _get_cached_perm(key)
+    if cached is not None:
+        return cached
 
-    settings = getattr(bot, "settings").get(interaction.guild_id)
-    if not settings.dj_role_id:
-        return True
+    if member.guild_permissions.value & _ADMIN_PERMS_MASK:
+        result = True
+    elif not settings.dj_role_id:
+        result = True
+    else:
+        result = member.get_role(settings.dj_role_id) is not None
 
-    return any(r.id == settings.dj_role_id for r in member.roles)
+    _set_cached_perm(key, result)
+    return result
 
 
 def _is_admin(bot: commands.Bot, interaction: discord.Interaction) -> bool:
     member = interaction.user if isinstance(interaction.user, discord.Member) else None
     if not member:
         return False
-    return member.guild_permissions.administrator or member.guild_permissions.manage_guild
 
+    key = (member.guild.id, member.id, "admin", None)
+    cached = _get_cached_perm(key)
+    if cached is not None:
+        return cached
 
-def _author_voice_channel(
-    interaction: discord.Interaction,
-) -> discord.VoiceChannel | discord.StageChannel | None:
-    member = interaction.user if isinstance(interaction.user, discord.Member) else None
-    if not member or not member.voice or not member.voice.channel:
-        return None
-    return member.voice.channel
+    result = bool(member.guild_permissions.value & _ADMIN_PERMS_MASK)
+    _set_cached_perm(key, result)
+    return result
 
 
 async def _get_player(interaction: discord.Interaction) -> wavelink.Player | None:
@@ -161,8 +284,22 @@ async def _get_player(interaction: discord.Interaction) -> wavelink.Player | Non
     return None
 
 
+# ------------------------------------------------------------------------------
+# Helper: _resolved_player
+# Purpose: Resolve player 1 lần cho mỗi interaction (lưu trong interaction.extras).
+#          Gọi sau kiểm tra quyền để request bị từ chối không phải tra voice client.
+# ------------------------------------------------------------------------------
+async def _resolved_player(interaction: discord.Interaction) -> wavelink.Player | None:
+    extras = interaction.extras
+    if "player" not in extras:
+        extras["player"] = await _get_player(interaction)
+    return extras["player"]
+
+
 async def _ensure_same_channel(interaction: discord.Interaction, player: wavelink.Player) -> bool:
-    channel = _author_voice_channel(interaction)
+    # User (không phải Member) không có .voice -> coi như chưa vào voice.
+    voice = getattr(interaction.user, "voice", None)
+    channel = voice.channel if voice else None
     if not channel:
         await interaction.response.send_message("Bạn cần vào voice channel trước.", ephemeral=True)
         return False
@@ -188,10 +325,11 @@ async def _send_queue_ephemeral(bot: commands.Bot, interaction: discord.Interact
         )
 
     if player.queue:
-        lines: list[str] = []
-        for i, t in enumerate(list(player.queue)[:10], start=1):
-            lines.append(f"{i}. {t.title} ({format_ms(t.length)})")
-        embed.add_field(name="Tiếp theo", value="\n".join(lines), inline=False)
+        # Chỉ duyệt 10 bài đầu, không copy cả queue.
+        value = "\n".join(
+            f"{i}. {t.title} ({format_ms(t.length)})" for i, t in enumerate(islice(player.queue, 10), start=1)
+        )
+        embed.add_field(name="Tiếp theo", value=value, inline=False)
     else:
         embed.add_field(name="Tiếp theo", value="(trống)", inline=False)
 
@@ -787,107 +925,255 @@ FILTER_PRESETS: dict[str, dict[str, Any]] = {
 }
 
 
+# ------------------------------------------------------------------------------
+# FILTER CATEGORIES
+# Nhóm preset theo category cho /filters. Dựng 1 lần lúc import, chỉ giữ preset có thật.
+# ------------------------------------------------------------------------------
+_FILTER_CATEGORY_NAMES: dict[str, tuple[str, ...]] = {
+    "Quality": (
+        "balanced", "studio", "clarity", "presence", "warm", "bright",
+        "smooth", "basscut", "trebleboost", "tightbass", "stage",
+    ),
+    "Bass Mix": ("bassclarity", "bassvocal", "basswide", "basssmooth"),
+    "Bass": ("bassboost", "deepbass", "softbass", "megabass", "heavybass"),
+    "Pitch/Key": ("pitchup", "pitchdown", "pitchup2", "pitchdown2"),
+    "Speed/Pitch": ("nightcore", "daycore", "slowed", "superslow", "doubletime", "chipmunk", "darthvader"),
+    "Aesthetic": ("lofi", "vaporwave"),
+    "3D/Spatial": ("8d", "reverse8d", "stereowide", "mono"),
+    "Modulation": ("vibrato", "tremolo"),
+    "Vocal": ("vocal", "vocalclear", "vocalair", "karaoke"),
+    "Genre EQ": ("rock", "pop", "electronic", "cinema", "party"),
+    "Effects": ("underwater", "phone", "radio", "distorted"),
+}
+
+FILTER_CATEGORIES: dict[str, tuple[str, ...]] = {
+    category: tuple(name for name in names if name in FILTER_PRESETS)
+    for category, names in _FILTER_CATEGORY_NAMES.items()
+}
+
+
+# Thứ tự preset trong Select Menu (theo category để dễ tìm), lọc sẵn preset có thật (trừ reset).
+_FILTER_ORDER: tuple[str, ...] = (
+    # Cơ bản
+    "off",
+    # Quality/Clarity
+    "balanced", "studio", "clarity", "presence", "vocalclear", "vocalair",
+    "warm", "bright", "smooth", "basscut", "trebleboost", "tightbass", "stage",
+    # Bass Mix
+    "bassclarity", "bassvocal", "basswide", "basssmooth",
+    # Bass
+    "bassboost", "deepbass", "softbass", "megabass", "heavybass",
+    # Pitch/Key
+    "pitchup", "pitchdown", "pitchup2", "pitchdown2",
+    # Speed/Pitch
+    "nightcore", "daycore", "slowed", "superslow", "doubletime",
+    "chipmunk", "darthvader",
+    # Aesthetic
+    "lofi", "vaporwave",
+    # 3D/Spatial
+    "8d", "reverse8d", "stereowide", "mono",
+    # Modulation
+    "vibrato", "tremolo",
+    # Vocal
+    "karaoke", "vocal",
+    # Genre EQ
+    "rock", "pop", "electronic", "cinema", "party",
+    # Fun/Effects
+    "underwater", "phone", "radio", "distorted",
+)
+
+_SELECT_FILTER_ORDER: tuple[str, ...] = tuple(
+    name for name in _FILTER_ORDER if name in FILTER_PRESETS and name != "reset"
+)
+
+
+# Preset đặc biệt: xoá toàn bộ filter thay vì áp dụng cấu hình.
+_RESET_PRESETS = frozenset({"off", "reset"})
+
+
+# ------------------------------------------------------------------------------
+# Class: PresetConfig
+# Purpose: Bản typed (immutable) của 1 entry FILTER_PRESETS.
+#          FILTER_PRESETS giữ dạng dict literal cho dễ sửa, PresetConfig dùng khi dựng Filters.
+# ------------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class PresetConfig:
+    description: str = ""
+    equalizer: list[dict[str, Any]] | None = None
+    timescale: dict[str, float] | None = None
+    rotation: dict[str, float] | None = None
+    vibrato: dict[str, float] | None = None
+    tremolo: dict[str, float] | None = None
+    karaoke: dict[str, float] | None = None
+    low_pass: dict[str, float] | None = None
+    channel_mix: dict[str, float] | None = None
+    distortion: dict[str, float] | None = None
+
+
+_PRESET_OBJS: dict[str, PresetConfig] = {name: PresetConfig(**config) for name, config in FILTER_PRESETS.items()}
+
+
+# ------------------------------------------------------------------------------
+# Helper: _build_filters
+# Purpose: Dựng wavelink.Filters từ config của 1 preset.
+#          Chỉ chạy 1 lần cho mỗi preset (xem _get_compiled), không chạy mỗi lần đổi filter.
+# ------------------------------------------------------------------------------
+def _build_filters(config: PresetConfig) -> wavelink.Filters:
+    filters = wavelink.Filters()
+
+    # Áp dụng Equalizer
+    if config.equalizer is not None:
+        filters.equalizer.set(bands=cast(Any, config.equalizer))
+
+    # Áp dụng Timescale (pitch/speed/rate)
+    ts = config.timescale
+    if ts is not None:
+        filters.timescale.set(
+            pitch=ts.get("pitch", 1.0),
+            speed=ts.get("speed", 1.0),
+            rate=ts.get("rate", 1.0),
+        )
+
+    # Áp dụng Rotation (8D)
+    if config.rotation is not None:
+        filters.rotation.set(rotation_hz=config.rotation["rotation_hz"])
+
+    # Áp dụng Vibrato
+    vib = config.vibrato
+    if vib is not None:
+        filters.vibrato.set(
+            frequency=vib.get("frequency", 2.0),
+            depth=vib.get("depth", 0.5),
+        )
+
+    # Áp dụng Tremolo
+    trem = config.tremolo
+    if trem is not None:
+        filters.tremolo.set(
+            frequency=trem.get("frequency", 2.0),
+            depth=trem.get("depth", 0.5),
+        )
+
+    # Áp dụng Karaoke
+    kar = config.karaoke
+    if kar is not None:
+        filters.karaoke.set(
+            level=kar.get("level", 1.0),
+            mono_level=kar.get("mono_level", 1.0),
+            filter_band=kar.get("filter_band", 220.0),
+            filter_width=kar.get("filter_width", 100.0),
+        )
+
+    # Áp dụng Low Pass
+    if config.low_pass is not None:
+        filters.low_pass.set(smoothing=config.low_pass["smoothing"])
+
+    # Áp dụng Channel Mix
+    cm = config.channel_mix
+    if cm is not None:
+        filters.channel_mix.set(
+            left_to_left=cm.get("left_to_left", 1.0),
+            left_to_right=cm.get("left_to_right", 0.0),
+            right_to_left=cm.get("right_to_left", 0.0),
+            right_to_right=cm.get("right_to_right", 1.0),
+        )
+
+    # Áp dụng Distortion
+    dist = config.distortion
+    if dist is not None:
+        filters.distortion.set(
+            sin_offset=dist.get("sin_offset", 0.0),
+            sin_scale=dist.get("sin_scale", 1.0),
+            cos_offset=dist.get("cos_offset", 0.0),
+            cos_scale=dist.get("cos_scale", 1.0),
+            tan_offset=dist.get("tan_offset", 0.0),
+            tan_scale=dist.get("tan_scale", 1.0),
+            offset=dist.get("offset", 0.0),
+            scale=dist.get("scale", 1.0),
+        )
+
+    return filters
+
+
+# ------------------------------------------------------------------------------
+# Helper: _get_compiled
+# Purpose: Payload filter (dạng gửi lên Lavalink) của 1 preset, dựng + serialize ở lần
+#          dùng đầu tiên rồi giữ lại. Preset không ai dùng thì không bao giờ phải dựng.
+# ------------------------------------------------------------------------------
+@functools.cache
+def _get_compiled(preset: str) -> dict[str, Any]:
+    return cast(dict[str, Any], _build_filters(_PRESET_OBJS[preset])())
+
+
+# Danh sách cho autocomplete /filter, dựng 1 lần: (value, label, text tìm kiếm đã lower).
+_PRESET_CHOICES: tuple[tuple[str, str, str], ...] = tuple(
+    (
+        name,
+        f"{name.capitalize()} - {config.get('description', '')}"[:100],
+        f"{name}\n{config.get('description', '')}".lower(),
+    )
+    for name, config in FILTER_PRESETS.items()
+    if name != "reset"  # Bỏ qua reset, đã có off
+)
+
+
+# ------------------------------------------------------------------------------
+# Function: preset_autocomplete
+# Purpose: Trả về tối đa 25 cặp (label, value) khớp từ khóa (theo tên hoặc mô tả).
+#          Autocomplete gọi lại mỗi lần gõ phím, nên kết quả được cache theo query.
+# ------------------------------------------------------------------------------
+@functools.lru_cache(maxsize=256)
+def preset_autocomplete(query: str) -> tuple[tuple[str, str], ...]:
+    needle = query.lower()
+    matches = (
+        (label, name) for name, label, haystack in _PRESET_CHOICES if not needle or needle in haystack
+    )
+    # Discord giới hạn 25 choices
+    return tuple(islice(matches, 25))
+
+
+# ------------------------------------------------------------------------------
+# Helper: _fresh_filters
+# Purpose: Tạo bản Filters riêng cho player từ payload dựng sẵn.
+#          Filters giữ reference tới payload con, nên copy để các guild không dùng chung state.
+# ------------------------------------------------------------------------------
+def _fresh_filters(payload: dict[str, Any]) -> wavelink.Filters:
+    data: dict[str, Any] = {}
+    for key, value in payload.items():
+        if isinstance(value, list):
+            data[key] = [dict(band) for band in value]
+        elif isinstance(value, dict):
+            data[key] = dict(value)
+        else:
+            data[key] = value
+    return wavelink.Filters(data=cast(Any, data))
+
+
 # ------------------------------------------------------------------------------
 # Function: apply_filter_preset
 # Purpose: Áp dụng các bộ lọc âm thanh (Filters) dựa trên preset name.
 # ------------------------------------------------------------------------------
 async def apply_filter_preset(bot: commands.Bot, player: wavelink.Player, preset: str) -> None:
     preset = preset.strip().lower()
-    
+
     if preset not in FILTER_PRESETS:
         raise ValueError(f"Unknown preset: {preset}")
-    
-    config = FILTER_PRESETS[preset]
-    filters = wavelink.Filters()
-    
+
     # Reset nếu là off/reset
-    if preset in {"off", "reset"}:
+    if preset in _RESET_PRESETS:
         await player.set_filters(seek=True)
     else:
-        # Áp dụng Equalizer
-        if "equalizer" in config:
-            filters.equalizer.set(bands=cast(Any, config["equalizer"]))
-        
-        # Áp dụng Timescale (pitch/speed/rate)
-        if "timescale" in config:
-            ts = config["timescale"]
-            filters.timescale.set(
-                pitch=ts.get("pitch", 1.0),
-                speed=ts.get("speed", 1.0),
-                rate=ts.get("rate", 1.0),
-            )
-        
-        # Áp dụng Rotation (8D)
-        if "rotation" in config:
-            filters.rotation.set(rotation_hz=config["rotation"]["rotation_hz"])
-        
-        # Áp dụng Vibrato
-        if "vibrato" in config:
-            vib = config["vibrato"]
-            filters.vibrato.set(
-                frequency=vib.get("frequency", 2.0),
-                depth=vib.get("depth", 0.5),
-            )
-        
-        # Áp dụng Tremolo
-        if "tremolo" in config:
-            trem = config["tremolo"]
-            filters.tremolo.set(
-                frequency=trem.get("frequency", 2.0),
-                depth=trem.get("depth", 0.5),
-            )
-        
-        # Áp dụng Karaoke
-        if "karaoke" in config:
-            kar = config["karaoke"]
-            filters.karaoke.set(
-                level=kar.get("level", 1.0),
-                mono_level=kar.get("mono_level", 1.0),
-                filter_band=kar.get("filter_band", 220.0),
-                filter_width=kar.get("filter_width", 100.0),
-            )
-        
-        # Áp dụng Low Pass
-        if "low_pass" in config:
-            filters.low_pass.set(smoothing=config["low_pass"]["smoothing"])
-        
-        # Áp dụng Channel Mix
-        if "channel_mix" in config:
-            cm = config["channel_mix"]
-            filters.channel_mix.set(
-                left_to_left=cm.get("left_to_left", 1.0),
-                left_to_right=cm.get("left_to_right", 0.0),
-                right_to_left=cm.get("right_to_left", 0.0),
-                right_to_right=cm.get("right_to_right", 1.0),
-            )
-        
-        # Áp dụng Distortion
-        if "distortion" in config:
-            dist = config["distortion"]
-            filters.distortion.set(
-                sin_offset=dist.get("sin_offset", 0.0),
-                sin_scale=dist.get("sin_scale", 1.0),
-                cos_offset=dist.get("cos_offset", 0.0),
-                cos_scale=dist.get("cos_scale", 1.0),
-                tan_offset=dist.get("tan_offset", 0.0),
-                tan_scale=dist.get("tan_scale", 1.0),
-                offset=dist.get("offset", 0.0),
-                scale=dist.get("scale", 1.0),
-            )
-        
-        await player.set_filters(filters, seek=True)
-    
+        await player.set_filters(_fresh_filters(_get_compiled(preset)), seek=True)
+
     # Lưu preset vào settings
     if player.guild:
-        settings = getattr(bot, "settings").get(player.guild.id)
-        if hasattr(settings, "filters_preset"):
-            settings.filters_preset = "off" if preset in {"off", "reset"} else preset
+        settings = bot.settings.get(player.guild.id)  # type: ignore[attr-defined]
+        settings.filters_preset = "off" if preset in _RESET_PRESETS else preset
 
-        if hasattr(bot, "storage"):
-            try:
-                await getattr(bot, "storage").upsert_guild_settings(player.guild.id, settings)
-            except Exception:
-                logger.exception("Failed to persist filters_preset guild=%s", player.guild.id)
+        # Ghi DB được gom lại (SettingsWriter), không chặn interaction.
+        writer = getattr(bot, "settings_writer", None)
+        if writer is not None:
+            writer.schedule(player.guild.id, settings)
 
 
 # ------------------------------------------------------------------------------
@@ -897,55 +1183,29 @@ async def apply_filter_preset(bot: commands.Bot, player: wavelink.Player, preset
 def get_filter_options(page: int = 0, page_size: int = 25) -> list[discord.SelectOption]:
     # Lấy danh sách filter options cho Select Menu.
     # Discord giới hạn 25 options, nên cần phân trang.
-    # Danh sách filter theo category để dễ tìm
-    filter_order = [
-        # Cơ bản
-        "off",
-        # Quality/Clarity
-        "balanced", "studio", "clarity", "presence", "vocalclear", "vocalair",
-        "warm", "bright", "smooth", "basscut", "trebleboost", "tightbass", "stage",
-        # Bass Mix
-        "bassclarity", "bassvocal", "basswide", "basssmooth",
-        # Bass
-        "bassboost", "deepbass", "softbass", "megabass", "heavybass",
-        # Pitch/Key
-        "pitchup", "pitchdown", "pitchup2", "pitchdown2",
-        # Speed/Pitch
-        "nightcore", "daycore", "slowed", "superslow", "doubletime", 
-        "chipmunk", "darthvader",
-        # Aesthetic
-        "lofi", "vaporwave",
-        # 3D/Spatial
-        "8d", "reverse8d", "stereowide", "mono",
-        # Modulation
-        "vibrato", "tremolo",
-        # Vocal
-        "karaoke", "vocal",
-        # Genre EQ
-        "rock", "pop", "electronic", "cinema", "party",
-        # Fun/Effects
-        "underwater", "phone", "radio", "distorted",
-    ]
-    
-    # Lọc chỉ lấy các filter có trong FILTER_PRESETS (trừ reset)
-    available = [f for f in filter_order if f in FILTER_PRESETS and f != "reset"]
-    
+    if page_size == _FILTER_PAGE_SIZE:
+        if 0 <= page < len(_FILTER_OPTIONS_BY_PAGE):
+            return list(_FILTER_OPTIONS_BY_PAGE[page])
+        return []
+
     start = page * page_size
-    end = start + page_size
-    page_filters = available[start:end]
-    
-    options = []
-    for name in page_filters:
-        config = FILTER_PRESETS[name]
-        label = f"{name.capitalize()}"
-        description = config.get("description", "")[:50]  # Giới hạn 50 ký tự
-        options.append(discord.SelectOption(
-            label=label, 
-            value=name, 
-            description=description
-        ))
-    
-    return options
+    return [_filter_option(name) for name in _SELECT_FILTER_ORDER[start:start + page_size]]
+
+
+def _filter_option(name: str) -> discord.SelectOption:
+    label = f"{name.capitalize()}"
+    description = FILTER_PRESETS[name].get("description", "")[:50]  # Giới hạn 50 ký tự
+    return discord.SelectOption(label=label, value=name, description=description)
+
+
+# Options của Select Menu dựng sẵn theo trang (page_size mặc định 25), view chỉ copy list.
+_FILTER_PAGE_SIZE = 25
+# Select mỗi trang có custom_id riêng: prefix + số trang.
+_FILTER_SELECT_ID_PREFIX = "music:filter_preset:"
+_FILTER_OPTIONS_BY_PAGE: tuple[tuple[discord.SelectOption, ...], ...] = tuple(
+    tuple(_filter_option(name) for name in _SELECT_FILTER_ORDER[i:i + _FILTER_PAGE_SIZE])
+    for i in range(0, len(_SELECT_FILTER_ORDER), _FILTER_PAGE_SIZE)
+)
 
 
 # ------------------------------------------------------------------------------
@@ -953,6 +1213,8 @@ def get_filter_options(page: int = 0, page_size: int = 25) -> list[discord.Selec
 # Purpose: Menu chọn filter preset trong giao diện điều khiển.
 # ------------------------------------------------------------------------------
 class FilterPresetSelect(discord.ui.Select):
+    __slots__ = ("_bot", "_page")
+
     def __init__(self, bot: commands.Bot, page: int = 0) -> None:
         self._bot = bot
         self._page = page
@@ -964,20 +1226,17 @@ class FilterPresetSelect(discord.ui.Select):
             min_values=1,
             max_values=1,
             options=options,
-            custom_id=f"music:filter_preset:{page}",
+            custom_id=f"{_FILTER_SELECT_ID_PREFIX}{page}",
             row=4,
         )
 
     async def callback(self, interaction: discord.Interaction) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
+        # Guild đã được PlayerControlView.interaction_check kiểm tra.
         if not _is_dj_or_admin(self._bot, interaction):
             await interaction.response.send_message("Bạn không có quyền dùng filter.", ephemeral=True)
             return
 
-        player = await _get_player(interaction)
+        player = await _resolved_player(interaction)
         if not player:
             await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
             return
@@ -988,7 +1247,11 @@ class FilterPresetSelect(discord.ui.Select):
         await interaction.response.defer()
 
         preset = self.values[0]
-        async with guild_lock(interaction.guild_id):
+        async with try_guild_lock(interaction.guild_id) as acquired:
+            if not acquired:
+                await interaction.followup.send(_MSG_BUSY, ephemeral=True)
+                return
+
             try:
                 await asyncio.wait_for(
                     apply_filter_preset(self._bot, player, preset),
@@ -1030,16 +1293,154 @@ class FilterPresetSelect(discord.ui.Select):
         embed = build_controller_embed(self._bot, player)
         await interaction.edit_original_response(embed=embed)
 
+        # Ghi nhận embed vừa gửi để các nút phía sau không edit lại nội dung y hệt.
+        if interaction.message is not None:
+            _remember_embed(interaction.message.id, _embed_fingerprint(embed))
+
 
 # ------------------------------------------------------------------------------
 # Function: get_total_filter_pages
 # Purpose: Tính tổng số trang filter dựa trên số lượng presets.
 # ------------------------------------------------------------------------------
 def get_total_filter_pages(page_size: int = 25) -> int:
-    # Tính tổng số trang cho filter menu.
-    # Lọc bỏ reset
-    available = [k for k in FILTER_PRESETS.keys() if k != "reset"]
-    return max(1, (len(available) + page_size - 1) // page_size)
+    # Tính tổng số trang cho filter menu (đã lọc bỏ reset).
+    if page_size == _FILTER_PAGE_SIZE:
+        return _TOTAL_FILTER_PAGES
+    return max(1, (len(_SELECT_FILTER_ORDER) + page_size - 1) // page_size)
+
+
+# Số trang filter cố định theo FILTER_PRESETS, tính 1 lần lúc import.
+_TOTAL_FILTER_PAGES = max(1, len(_FILTER_OPTIONS_BY_PAGE))
+
+
+# ------------------------------------------------------------------------------
+# Helper: _message_filter_page
+# Purpose: Đọc trang filter đang hiển thị từ custom_id của select trên message controller.
+# ------------------------------------------------------------------------------
+def _message_filter_page(message: discord.Message | None) -> int:
+    if message is None:
+        return 0
+    for row in message.components:
+        for child in getattr(row, "children", ()):
+            custom_id = getattr(child, "custom_id", None) or ""
+            if custom_id.startswith(_FILTER_SELECT_ID_PREFIX):
+                try:
+                    return int(custom_id[len(_FILTER_SELECT_ID_PREFIX):]) % _TOTAL_FILTER_PAGES
+                except ValueError:
+                    return 0
+    return 0
+
+
+# ------------------------------------------------------------------------------
+# Helper: _embed_fingerprint
+# Purpose: Hash phần nội dung hiển thị của embed controller để phát hiện edit không đổi gì.
+# ------------------------------------------------------------------------------
+def _embed_fingerprint(embed: discord.Embed) -> int:
+    return hash((
+        embed.title,
+        embed.description,
+        embed.color,
+        embed.thumbnail.url,
+        embed.footer.text,
+        tuple((f.name, f.value, f.inline) for f in embed.fields),
+    ))
+
+
+# Hash embed controller đã gửi gần nhất: {message_id: fingerprint}, dùng chung mọi view.
+# Giới hạn _EMBED_HASH_MAX message (bỏ message cũ nhất) vì sống suốt process.
+_EMBED_HASHES: dict[int, int] = {}
+_EMBED_HASH_MAX = 1024
+
+
+def _remember_embed(message_id: int, fingerprint: int) -> None:
+    # Lưu hash embed vừa gửi cho message.
+    _EMBED_HASHES.pop(message_id, None)
+    if len(_EMBED_HASHES) >= _EMBED_HASH_MAX:
+        del _EMBED_HASHES[next(iter(_EMBED_HASHES))]
+    _EMBED_HASHES[message_id] = fingerprint
+
+
+# ------------------------------------------------------------------------------
+# Function: invalidate_embed_hash
+# Purpose: Quên hash embed của message khi nó được edit ngoài đường debounce của view
+#          (refresh từ bot/cog, đổi trang filter, rời kênh), để lần bấm sau không bị bỏ qua.
+# ------------------------------------------------------------------------------
+def invalidate_embed_hash(message_id: int) -> None:
+    _EMBED_HASHES.pop(message_id, None)
+
+
+# ------------------------------------------------------------------------------
+# Helper: _guarded
+# Purpose: Decorator gom các bước kiểm tra lặp lại ở mọi nút của PlayerControlView:
+#          quyền (dj/admin) -> player (có/đang phát/có bài) -> cùng voice channel.
+#          Guild đã được kiểm tra trong interaction_check; quyền kiểm tra trước khi tra player.
+#          Callback được gọi với player đã resolve: callback(self, interaction, player).
+# ------------------------------------------------------------------------------
+_MSG_GUILD_ONLY = "Lệnh này chỉ dùng trong server."
+_MSG_NO_PLAYER = "Bot chưa ở trong voice channel."
+_MSG_NOT_PLAYING = "Không có bài đang phát."
+_MSG_BUSY = "Đang có thao tác khác chạy, thử lại sau giây lát."
+
+
+def _guarded(
+    *,
+    dj: str | None = None,
+    admin: str | None = None,
+    needs: str = "player",
+    same_channel: bool = True,
+    defer: bool = True,
+) -> Callable[[Callable[..., Awaitable[None]]], Callable[..., Awaitable[None]]]:
+    # dj/admin: message khi thiếu quyền (None = không kiểm tra).
+    # needs: "player" (chỉ cần player), "playing" (đang phát), "current" (có bài hiện tại).
+    # defer: ACK interaction ngay sau khi qua kiểm tra, để chờ Lavalink không vượt hạn 3s;
+    #        callback khi đó trả lời bằng followup/edit_original_response.
+    def deco(func: Callable[..., Awaitable[None]]) -> Callable[..., Awaitable[None]]:
+        @functools.wraps(func)
+        async def wrapper(self: PlayerControlView, interaction: discord.Interaction, _: discord.ui.Button) -> None:
+            if dj is not None and not _is_dj_or_admin(self._bot, interaction):
+                await interaction.response.send_message(dj, ephemeral=True)
+                return
+
+            if admin is not None and not _is_admin(self._bot, interaction):
+                await interaction.response.send_message(admin, ephemeral=True)
+                return
+
+            player = await _resolved_player(interaction)
+            if needs == "playing":
+                if not player or not player.playing:
+                    await interaction.response.send_message(_MSG_NOT_PLAYING, ephemeral=True)
+                    return
+            elif needs == "current":
+                if not player or not player.current:
+                    await interaction.response.send_message(_MSG_NOT_PLAYING, ephemeral=True)
+                    return
+            elif not player:
+                await interaction.response.send_message(_MSG_NO_PLAYER, ephemeral=True)
+                return
+
+            if same_channel and not await _ensure_same_channel(interaction, player):
+                return
+
+            if defer:
+                await interaction.response.defer()
+
+            await func(self, interaction, player)
+
+        return wrapper
+
+    return deco
+
+
+# ------------------------------------------------------------------------------
+# Function: get_controller_view
+# Purpose: Lấy PlayerControlView đã đăng ký persistent cho 1 trang filter
+#          (bot.controller_views, dựng trong setup_hook); chưa có thì dựng mới.
+# ------------------------------------------------------------------------------
+def get_controller_view(bot: commands.Bot, filter_page: int = 0) -> PlayerControlView:
+    views: list[PlayerControlView] = getattr(bot, "controller_views", None) or []
+    if views:
+        return views[filter_page % len(views)]
+    return PlayerControlView(bot, filter_page=filter_page)
 
 
 # ------------------------------------------------------------------------------
@@ -1047,21 +1448,48 @@ def get_total_filter_pages(page_size: int = 25) -> int:
 # Purpose: View chứa các nút điều khiển (Pause, Skip, Stop, v.v.).
 # ------------------------------------------------------------------------------
 class PlayerControlView(discord.ui.View):
+    _total_filter_pages = _TOTAL_FILTER_PAGES
+
+    # Base class của discord.py vẫn có __dict__; slots chỉ cho attribute riêng của view.
+    __slots__ = (
+        "_bot",
+        "_pending_edits",
+        "_settings_store",
+        "_settings_writer",
+    )
+
     def __init__(self, bot: commands.Bot, filter_page: int = 0) -> None:
         super().__init__(timeout=None)
         self._bot = bot
-        self._filter_page = filter_page
-        self._total_filter_pages = get_total_filter_pages()
+        # Task edit đang chờ debounce theo message id (view persistent dùng chung nhiều message).
+        self._pending_edits: dict[int, asyncio.Task[None]] = {}
+        # Bind 1 lần thay vì resolve attribute của bot trong mỗi callback.
+        self._settings_store: Any = getattr(bot, "settings", None)
+        self._settings_writer: Any = getattr(bot, "settings_writer", None)
 
         # Thêm filter select menu với trang hiện tại
         self.add_item(FilterPresetSelect(bot, page=filter_page))
         
         # Cập nhật label của nút Filter Page để hiển thị trang hiện tại
-        for item in self.children:
-            if isinstance(item, discord.ui.Button) and item.custom_id == "music:filter_page":
-                item.label = f"Bộ lọc {filter_page + 1}/{self._total_filter_pages}"
-                break
+        # (View gắn sẵn item của @discord.ui.button lên instance theo tên method).
+        self.filter_page_btn.label = f"Bộ lọc {filter_page + 1}/{self._total_filter_pages}"
+
+    # --------------------------------------------------------------------------
+    # Method: interaction_check
+    # Purpose: Chạy 1 lần trước mọi nút/select: chặn interaction ngoài server.
+    #          Player được resolve lười trong callback, sau kiểm tra quyền.
+    # --------------------------------------------------------------------------
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if not interaction.guild_id:
+            await interaction.response.send_message(_MSG_GUILD_ONLY, ephemeral=True)
+            return False
+        return True
 
+    # --------------------------------------------------------------------------
+    # Method: _edit_message
+    # Purpose: Edit controller sau CONTROLLER_EDIT_DEBOUNCE (interaction đã được defer trong _guarded).
+    #          Bấm liên tục trên cùng message chỉ tạo 1 lần edit với state mới nhất.
+    # --------------------------------------------------------------------------
     async def _edit_message(
         self,
         interaction: discord.Interaction,
@@ -1069,8 +1497,96 @@ class PlayerControlView(discord.ui.View):
         *,
         notice: str | None = None,
     ) -> None:
-        embed = build_controller_embed(self._bot, player, notice=notice)
-        await interaction.response.edit_message(embed=embed)
+        message = interaction.message
+        if message is None:
+            embed = build_controller_embed(self._bot, player, notice=notice)
+            await interaction.edit_original_response(embed=embed)
+            return
+
+        pending = self._pending_edits.get(message.id)
+        if pending is not None and not pending.done():
+            pending.cancel()
+        self._pending_edits[message.id] = asyncio.create_task(
+            self._debounced_edit(interaction, player, message.id, notice)
+        )
+
+    async def _debounced_edit(
+        self,
+        interaction: discord.Interaction,
+        player: wavelink.Player,
+        message_id: int,
+        notice: str | None,
+    ) -> None:
+        try:
+            await asyncio.sleep(CONTROLLER_EDIT_DEBOUNCE)
+            embed = build_controller_embed(self._bot, player, notice=notice)
+            fingerprint = _embed_fingerprint(embed)
+            if _EMBED_HASHES.get(message_id) == fingerprint:
+                return
+            await interaction.edit_original_response(embed=embed)
+            _remember_embed(message_id, fingerprint)
+        except discord.HTTPException:
+            # Message bị xóa/hết hạn token: không giữ hash của message đó nữa.
+            invalidate_embed_hash(message_id)
+        except Exception:
+            # Task chạy nền: log tại đây thay vì để asyncio báo "Task exception was never retrieved".
+            logger.exception("Failed to edit controller message=%s guild=%s", message_id, interaction.guild_id)
+            invalidate_embed_hash(message_id)
+        finally:
+            # Task bị thay bởi lần bấm mới thì entry đã thuộc về task mới.
+            if self._pending_edits.get(message_id) is asyncio.current_task():
+                del self._pending_edits[message_id]
+
+    # --------------------------------------------------------------------------
+    # Method: _adjust_volume
+    # Purpose: Thân chung cho Vol -/Vol + (delta âm/dương), kẹp trong [VOLUME_MIN, VOLUME_MAX].
+    # --------------------------------------------------------------------------
+    async def _adjust_volume(self, interaction: discord.Interaction, player: wavelink.Player, delta: int) -> None:
+        current = int(player.volume)
+        value = current + delta
+        new = VOLUME_MIN if value < VOLUME_MIN else VOLUME_MAX if value > VOLUME_MAX else value
+        if new == current:
+            # Đã chạm giới hạn: không gọi Lavalink, không edit controller.
+            return
+
+        async with try_guild_lock(interaction.guild_id) as acquired:
+            if not acquired:
+                await interaction.followup.send(_MSG_BUSY, ephemeral=True)
+                return
+
+            try:
+                await player.set_volume(new)
+            except Exception:
+                logger.exception("Failed volume change delta=%s guild=%s", delta, interaction.guild_id)
+                await interaction.followup.send("Không thể chỉnh volume.", ephemeral=True)
+                return
+
+        await self._edit_message(interaction, player)
+
+    # --------------------------------------------------------------------------
+    # Method: _seek_relative
+    # Purpose: Thân chung cho -10s/+10s, kẹp vị trí trong [0, độ dài bài].
+    # --------------------------------------------------------------------------
+    async def _seek_relative(self, interaction: discord.Interaction, player: wavelink.Player, delta_ms: int) -> None:
+        current = player.current
+        if not current or not current.is_seekable:
+            await interaction.followup.send("Bài này không hỗ trợ seek.", ephemeral=True)
+            return
+
+        async with try_guild_lock(interaction.guild_id) as acquired:
+            if not acquired:
+                await interaction.followup.send(_MSG_BUSY, ephemeral=True)
+                return
+
+            try:
+                ms = max(0, min(current.length, player.position + delta_ms))
+                await player.seek(ms)
+            except Exception:
+                logger.exception("Failed seek delta=%s guild=%s", delta_ms, interaction.guild_id)
+                await interaction.followup.send("Không thể seek.", ephemeral=True)
+                return
+
+        await self._edit_message(interaction, player)
 
     @discord.ui.button(
         label="Dừng/Phát",
@@ -1078,109 +1594,71 @@ class PlayerControlView(discord.ui.View):
         custom_id="music:pause_resume",
         row=0,
     )
-    async def pause_resume(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player or not player.playing:
-            await interaction.response.send_message("Không có bài đang phát.", ephemeral=True)
-            return
-
-        if not await _ensure_same_channel(interaction, player):
-            return
+    @_guarded(needs="playing")
+    async def pause_resume(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        async with try_guild_lock(interaction.guild_id) as acquired:
+            if not acquired:
+                await interaction.followup.send(_MSG_BUSY, ephemeral=True)
+                return
 
-        async with guild_lock(interaction.guild_id):
             try:
                 await player.pause(not player.paused)
             except Exception:
                 logger.exception("Failed pause/resume guild=%s", interaction.guild_id)
-                await interaction.response.send_message("Không thể pause/resume.", ephemeral=True)
+                await interaction.followup.send("Không thể pause/resume.", ephemeral=True)
                 return
 
         await self._edit_message(interaction, player)
 
     @discord.ui.button(label="Qua bài", style=discord.ButtonStyle.primary, custom_id="music:skip", row=0)
-    async def skip(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        if not _is_dj_or_admin(self._bot, interaction):
-            await interaction.response.send_message("Bạn không có quyền skip.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player or not player.playing:
-            await interaction.response.send_message("Không có bài đang phát.", ephemeral=True)
-            return
-
-        if not await _ensure_same_channel(interaction, player):
-            return
+    @_guarded(dj="Bạn không có quyền skip.", needs="playing")
+    async def skip(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        async with try_guild_lock(interaction.guild_id) as acquired:
+            if not acquired:
+                await interaction.followup.send(_MSG_BUSY, ephemeral=True)
+                return
 
-        async with guild_lock(interaction.guild_id):
             try:
                 old = player.current
                 await player.skip(force=True)
             except Exception:
                 logger.exception("Failed skip guild=%s", interaction.guild_id)
-                await interaction.response.send_message("Không thể skip.", ephemeral=True)
+                await interaction.followup.send("Không thể skip.", ephemeral=True)
                 return
 
         notice = f"Đã skip '{old.title}'." if old else None
         await self._edit_message(interaction, player, notice=notice)
 
     @discord.ui.button(label="Dừng phát", style=discord.ButtonStyle.danger, custom_id="music:stop", row=0)
-    async def stop_playback(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        if not _is_dj_or_admin(self._bot, interaction):
-            await interaction.response.send_message("Bạn không có quyền stop.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player:
-            await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
-            return
-
-        if not await _ensure_same_channel(interaction, player):
-            return
+    @_guarded(dj="Bạn không có quyền stop.")
+    async def stop_playback(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        async with try_guild_lock(interaction.guild_id) as acquired:
+            if not acquired:
+                await interaction.followup.send(_MSG_BUSY, ephemeral=True)
+                return
 
-        async with guild_lock(interaction.guild_id):
             try:
                 player.queue.reset()
-                await player.skip(force=True)
+                # Như /stop: tắt autoplay để track_end không tự lấy bài gợi ý phát tiếp.
+                player.autoplay = wavelink.AutoPlayMode.partial
+                # skip() là 1 lần update Lavalink; bỏ qua nếu không có bài đang phát.
+                if player.current:
+                    await player.skip(force=True)
             except Exception:
                 logger.exception("Failed stop guild=%s", interaction.guild_id)
-                await interaction.response.send_message("Không thể stop.", ephemeral=True)
+                await interaction.followup.send("Không thể stop.", ephemeral=True)
                 return
 
         await self._edit_message(interaction, player, notice="Đã dừng phát và xóa hàng đợi.")
 
     @discord.ui.button(label="Thoát", style=discord.ButtonStyle.danger, custom_id="music:leave", row=0)
-    async def leave(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        if not _is_dj_or_admin(self._bot, interaction):
-            await interaction.response.send_message("Bạn không có quyền disconnect.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player:
-            await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
-            return
-
-        if not await _ensure_same_channel(interaction, player):
-            return
-
-        await interaction.response.defer()
+    @_guarded(dj="Bạn không có quyền disconnect.")
+    async def leave(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        async with try_guild_lock(interaction.guild_id) as acquired:
+            if not acquired:
+                await interaction.followup.send(_MSG_BUSY, ephemeral=True)
+                return
 
-        async with guild_lock(interaction.guild_id):
             try:
                 await asyncio.wait_for(player.disconnect(), timeout=PLAYER_OP_TIMEOUT)
             except asyncio.TimeoutError:
@@ -1197,6 +1675,10 @@ class PlayerControlView(discord.ui.View):
             "view": None,
         }
 
+        if interaction.message:
+            # Controller đã gỡ view: không còn edit nào cho message này.
+            invalidate_embed_hash(interaction.message.id)
+
         try:
             if interaction.message:
                 await interaction.message.edit(**payload)
@@ -1206,297 +1688,106 @@ class PlayerControlView(discord.ui.View):
             pass
 
     @discord.ui.button(label="Hàng đợi", style=discord.ButtonStyle.secondary, custom_id="music:queue", row=0)
-    async def queue(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player:
-            await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
-            return
-
+    @_guarded(same_channel=False, defer=False)
+    async def queue(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
         await _send_queue_ephemeral(self._bot, interaction, player)
 
     @discord.ui.button(label="Vol -", style=discord.ButtonStyle.secondary, custom_id="music:vol_down", row=1)
-    async def vol_down(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        if not _is_dj_or_admin(self._bot, interaction):
-            await interaction.response.send_message("Bạn không có quyền chỉnh volume.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player:
-            await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
-            return
-
-        if not await _ensure_same_channel(interaction, player):
-            return
-
-        async with guild_lock(interaction.guild_id):
-            try:
-                new = max(0, min(int(player.volume) - 5, 100))
-                await player.set_volume(new)
-            except Exception:
-                logger.exception("Failed vol down guild=%s", interaction.guild_id)
-                await interaction.response.send_message("Không thể chỉnh volume.", ephemeral=True)
-                return
-
-        await self._edit_message(interaction, player)
+    @_guarded(dj="Bạn không có quyền chỉnh volume.")
+    async def vol_down(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        await self._adjust_volume(interaction, player, -VOLUME_STEP)
 
     @discord.ui.button(label="Vol +", style=discord.ButtonStyle.secondary, custom_id="music:vol_up", row=1)
-    async def vol_up(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        if not _is_dj_or_admin(self._bot, interaction):
-            await interaction.response.send_message("Bạn không có quyền chỉnh volume.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player:
-            await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
-            return
-
-        if not await _ensure_same_channel(interaction, player):
-            return
-
-        async with guild_lock(interaction.guild_id):
-            try:
-                new = max(0, min(int(player.volume) + 5, 100))
-                await player.set_volume(new)
-            except Exception:
-                logger.exception("Failed vol up guild=%s", interaction.guild_id)
-                await interaction.response.send_message("Không thể chỉnh volume.", ephemeral=True)
-                return
-
-        await self._edit_message(interaction, player)
+    @_guarded(dj="Bạn không có quyền chỉnh volume.")
+    async def vol_up(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        await self._adjust_volume(interaction, player, VOLUME_STEP)
 
     @discord.ui.button(label="-10s", style=discord.ButtonStyle.secondary, custom_id="music:seek_back", row=1)
-    async def seek_back(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        if not _is_dj_or_admin(self._bot, interaction):
-            await interaction.response.send_message("Bạn không có quyền seek.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player or not player.current:
-            await interaction.response.send_message("Không có bài đang phát.", ephemeral=True)
-            return
-
-        if not player.current.is_seekable:
-            await interaction.response.send_message("Bài này không hỗ trợ seek.", ephemeral=True)
-            return
-
-        if not await _ensure_same_channel(interaction, player):
-            return
-
-        async with guild_lock(interaction.guild_id):
-            try:
-                ms = max(0, player.position - 10_000)
-                await player.seek(ms)
-            except Exception:
-                logger.exception("Failed seek back guild=%s", interaction.guild_id)
-                await interaction.response.send_message("Không thể seek.", ephemeral=True)
-                return
-
-        await self._edit_message(interaction, player)
+    @_guarded(dj="Bạn không có quyền seek.", needs="current")
+    async def seek_back(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        await self._seek_relative(interaction, player, -SEEK_STEP_MS)
 
     @discord.ui.button(label="+10s", style=discord.ButtonStyle.secondary, custom_id="music:seek_fwd", row=1)
-    async def seek_fwd(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        if not _is_dj_or_admin(self._bot, interaction):
-            await interaction.response.send_message("Bạn không có quyền seek.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player or not player.current:
-            await interaction.response.send_message("Không có bài đang phát.", ephemeral=True)
-            return
-
-        if not player.current.is_seekable:
-            await interaction.response.send_message("Bài này không hỗ trợ seek.", ephemeral=True)
-            return
-
-        if not await _ensure_same_channel(interaction, player):
-            return
-
-        async with guild_lock(interaction.guild_id):
-            try:
-                ms = min(player.current.length, player.position + 10_000)
-                await player.seek(ms)
-            except Exception:
-                logger.exception("Failed seek fwd guild=%s", interaction.guild_id)
-                await interaction.response.send_message("Không thể seek.", ephemeral=True)
-                return
-
-        await self._edit_message(interaction, player)
+    @_guarded(dj="Bạn không có quyền seek.", needs="current")
+    async def seek_fwd(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        await self._seek_relative(interaction, player, SEEK_STEP_MS)
 
     @discord.ui.button(label="Lặp lại", style=discord.ButtonStyle.secondary, custom_id="music:loop", row=1)
-    async def loop(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        if not _is_dj_or_admin(self._bot, interaction):
-            await interaction.response.send_message("Bạn không có quyền chỉnh loop.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player:
-            await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
-            return
-
-        if not await _ensure_same_channel(interaction, player):
+    @_guarded(dj="Bạn không có quyền chỉnh loop.")
+    async def loop(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        # Chỉ đổi state trong bộ nhớ, không có await -> không cần guild_lock.
+        try:
+            current = player.queue.mode
+            next_mode = _NEXT_QUEUE_MODE[current]
+            player.queue.mode = next_mode
+        except Exception:
+            logger.exception("Failed loop guild=%s", interaction.guild_id)
+            await interaction.followup.send("Không thể chỉnh loop.", ephemeral=True)
             return
 
-        async with guild_lock(interaction.guild_id):
-            try:
-                current = player.queue.mode
-                next_mode = {
-                    wavelink.QueueMode.normal: wavelink.QueueMode.loop,
-                    wavelink.QueueMode.loop: wavelink.QueueMode.loop_all,
-                    wavelink.QueueMode.loop_all: wavelink.QueueMode.normal,
-                }[current]
-                player.queue.mode = next_mode
-            except Exception:
-                logger.exception("Failed loop guild=%s", interaction.guild_id)
-                await interaction.response.send_message("Không thể chỉnh loop.", ephemeral=True)
-                return
-
-        await self._edit_message(interaction, player, notice=f"Chế độ lặp: {_queue_mode_text(player.queue.mode)}")
+        await self._edit_message(interaction, player, notice=f"Chế độ lặp: {_QUEUE_MODE_TEXT[next_mode]}")
 
     @discord.ui.button(label="Trộn bài", style=discord.ButtonStyle.secondary, custom_id="music:shuffle", row=2)
-    async def shuffle(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        if not _is_dj_or_admin(self._bot, interaction):
-            await interaction.response.send_message("Bạn không có quyền shuffle.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player:
-            await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
-            return
-
+    @_guarded(dj="Bạn không có quyền shuffle.")
+    async def shuffle(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
         if not player.queue:
-            await interaction.response.send_message("Hàng đợi đang trống.", ephemeral=True)
+            await interaction.followup.send("Hàng đợi đang trống.", ephemeral=True)
             return
 
-        if not await _ensure_same_channel(interaction, player):
+        # queue.shuffle() là thao tác đồng bộ -> không cần guild_lock.
+        try:
+            player.queue.shuffle()
+        except Exception:
+            logger.exception("Failed shuffle guild=%s", interaction.guild_id)
+            await interaction.followup.send("Không thể shuffle.", ephemeral=True)
             return
 
-        async with guild_lock(interaction.guild_id):
-            try:
-                player.queue.shuffle()
-            except Exception:
-                logger.exception("Failed shuffle guild=%s", interaction.guild_id)
-                await interaction.response.send_message("Không thể shuffle.", ephemeral=True)
-                return
-
         await self._edit_message(interaction, player, notice="Đã trộn hàng đợi.")
 
     @discord.ui.button(label="Tự động", style=discord.ButtonStyle.secondary, custom_id="music:autoplay", row=2)
-    async def autoplay(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        if not _is_dj_or_admin(self._bot, interaction):
-            await interaction.response.send_message("Bạn không có quyền chỉnh autoplay.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player:
-            await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
+    @_guarded(dj="Bạn không có quyền chỉnh autoplay.")
+    async def autoplay(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        # Setter autoplay chỉ đổi state trong bộ nhớ, không có await -> không cần guild_lock.
+        try:
+            new_mode = (
+                wavelink.AutoPlayMode.partial
+                if player.autoplay is wavelink.AutoPlayMode.enabled
+                else wavelink.AutoPlayMode.enabled
+            )
+            player.autoplay = new_mode
+        except Exception:
+            logger.exception("Failed autoplay toggle guild=%s", interaction.guild_id)
+            await interaction.followup.send("Không thể chỉnh autoplay.", ephemeral=True)
             return
 
-        if not await _ensure_same_channel(interaction, player):
-            return
-
-        async with guild_lock(interaction.guild_id):
-            try:
-                player.autoplay = (
-                    wavelink.AutoPlayMode.partial
-                    if player.autoplay is wavelink.AutoPlayMode.enabled
-                    else wavelink.AutoPlayMode.enabled
-                )
-            except Exception:
-                logger.exception("Failed autoplay toggle guild=%s", interaction.guild_id)
-                await interaction.response.send_message("Không thể chỉnh autoplay.", ephemeral=True)
-                return
-
-        await self._edit_message(interaction, player, notice=f"Tự động phát: {_autoplay_text(player.autoplay)}")
+        await self._edit_message(interaction, player, notice=f"Tự động phát: {_AUTOPLAY_TEXT[new_mode]}")
 
     @discord.ui.button(label="24/7", style=discord.ButtonStyle.secondary, custom_id="music:247", row=2)
-    async def stay_247(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        if not _is_admin(self._bot, interaction):
-            await interaction.response.send_message("Chỉ admin mới dùng được 24/7.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player:
-            await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
-            return
-
-        settings = getattr(self._bot, "settings").get(interaction.guild_id)
+    @_guarded(admin="Chỉ admin mới dùng được 24/7.", same_channel=False)
+    async def stay_247(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        settings = self._settings_store.get(interaction.guild_id)
         settings.stay_247 = not settings.stay_247
 
-        if hasattr(self._bot, "storage"):
-            try:
-                await getattr(self._bot, "storage").upsert_guild_settings(interaction.guild_id, settings)
-            except Exception:
-                logger.exception("Failed to persist stay_247 guild=%s", interaction.guild_id)
+        if self._settings_writer is not None:
+            self._settings_writer.schedule(interaction.guild_id, settings)
 
         await self._edit_message(interaction, player, notice=f"Chế độ 24/7: {'Bật' if settings.stay_247 else 'Tắt'}")
 
     @discord.ui.button(label="Làm mới", style=discord.ButtonStyle.secondary, custom_id="music:refresh", row=2)
-    async def refresh(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player:
-            await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
-            return
-
-        embed = build_controller_embed(self._bot, player)
-        await interaction.response.edit_message(embed=embed)
+    @_guarded(same_channel=False)
+    async def refresh(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        await self._edit_message(interaction, player)
 
     @discord.ui.button(label="Bộ lọc 1/2", style=discord.ButtonStyle.secondary, custom_id="music:filter_page", row=3)
-    async def filter_page_btn(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        # Chuyển trang filter menu.
-        if not interaction.guild_id:
-            await interaction.response.send_message("Lệnh này chỉ dùng trong server.", ephemeral=True)
-            return
-
-        player = await _get_player(interaction)
-        if not player:
-            await interaction.response.send_message("Bot chưa ở trong voice channel.", ephemeral=True)
-            return
-
-        # Chuyển sang trang tiếp theo (vòng tròn)
-        next_page = (self._filter_page + 1) % self._total_filter_pages
-        
-        # Tạo View mới với trang filter mới
-        new_view = PlayerControlView(self._bot, filter_page=next_page)
-        
+    @_guarded(same_channel=False, defer=False)
+    async def filter_page_btn(self, interaction: discord.Interaction, player: wavelink.Player) -> None:
+        # Chuyển trang filter menu (vòng tròn).
+        # View persistent dùng chung mọi message nên trang hiện tại đọc từ message.
+        next_page = (_message_filter_page(interaction.message) + 1) % self._total_filter_pages
+
+        # Dùng lại view đã đăng ký cho trang đích thay vì dựng View mới mỗi lần bấm.
+        view = get_controller_view(self._bot, next_page)
         embed = build_controller_embed(self._bot, player)
-        await interaction.response.edit_message(embed=embed, view=new_view)
+        await interaction.response.edit_message(embed=embed, view=view)
+        if interaction.message is not None:
+            _remember_embed(interaction.message.id, _embed_fingerprint(embed))
@@ -12,8 +12,9 @@ from dataclasses import dataclass
 # ------------------------------------------------------------------------------
 # Class: GuildSettings
 # Purpose: Cấu trúc dữ liệu chứa cấu hình của một server.
+#          slots=True: mỗi guild giữ 1 instance suốt đời bot, bỏ __dict__ cho nhẹ RAM.
 # ------------------------------------------------------------------------------
-@dataclass
+@dataclass(slots=True)
 class GuildSettings:
     volume_default: int
     stay_247: bool = False
@@ -39,9 +40,11 @@ class GuildSettingsStore:
     # Purpose: Lấy setting của guild. Nếu chưa có, tạo mới với giá trị mặc định.
     # --------------------------------------------------------------------------
     def get(self, guild_id: int) -> GuildSettings:
-        existing = self._data.get(guild_id)
-        if existing:
-            return existing
+        # Fast path: 1 lần tra dict khi guild đã có settings
+        try:
+            return self._data[guild_id]
+        except KeyError:
+            pass
 
         created = GuildSettings(
             volume_default=self._default_volume,
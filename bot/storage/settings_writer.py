@@ -0,0 +1,95 @@
+# ##############################################################################
+# MODULE: SETTINGS WRITER
+# DESCRIPTION: Gom các lần ghi GuildSettings xuống DB theo guild trong 1 khoảng ngắn.
+#              Bấm nút liên tục (24/7, filter) chỉ tạo 1 lần ghi thay vì N lần.
+# ##############################################################################
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from bot.storage.memory import GuildSettings
+    from bot.storage.sqlite_storage import SQLiteStorage
+
+
+logger = logging.getLogger(__name__)
+
+# Thời gian gom các lần ghi (giây)
+SETTINGS_FLUSH_DELAY = 0.2
+
+
+# ------------------------------------------------------------------------------
+# Class: SettingsWriter
+# Purpose: Hàng đợi ghi settings theo guild. schedule() không chờ DB,
+#          flush chạy sau SETTINGS_FLUSH_DELAY và ghi tất cả guild trong 1 transaction.
+# ------------------------------------------------------------------------------
+class SettingsWriter:
+    def __init__(self, storage: SQLiteStorage, *, delay: float = SETTINGS_FLUSH_DELAY) -> None:
+        self._storage = storage
+        self._delay = delay
+        self._pending: dict[int, GuildSettings] = {}
+        self._task: asyncio.Task[None] | None = None
+        # Chỉ 1 flush chạy tại 1 thời điểm: snapshot lấy khi đã giữ lock nên luôn là bản mới nhất.
+        self._lock = asyncio.Lock()
+
+    # --------------------------------------------------------------------------
+    # Method: schedule
+    # Purpose: Đánh dấu settings của guild cần ghi. Lần ghi sau cùng thắng.
+    # --------------------------------------------------------------------------
+    def schedule(self, guild_id: int, settings: GuildSettings) -> None:
+        self._pending[guild_id] = settings
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        # schedule() gọi trong lúc đang flush không tạo task mới -> lặp tới khi hết hàng đợi.
+        while self._pending:
+            await asyncio.sleep(self._delay)
+            await self.flush()
+
+    # --------------------------------------------------------------------------
+    # Method: write_now
+    # Purpose: Ghi settings của guild ngay và chờ xong (lệnh slash), đi cùng hàng đợi
+    #          để 1 flush cũ đang chạy không ghi đè giá trị mới hơn.
+    # --------------------------------------------------------------------------
+    async def write_now(self, guild_id: int, settings: GuildSettings) -> None:
+        self._pending[guild_id] = settings
+        await self.flush()
+
+    # --------------------------------------------------------------------------
+    # Method: flush
+    # Purpose: Ghi ngay toàn bộ settings đang chờ.
+    # --------------------------------------------------------------------------
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, {}
+            try:
+                await self._storage.upsert_many_guild_settings(pending.items())
+            except asyncio.CancelledError:
+                # Bị hủy giữa chừng (close()): trả lại hàng đợi cho lần flush cuối.
+                for guild_id, settings in pending.items():
+                    self._pending.setdefault(guild_id, settings)
+                raise
+            except Exception:
+                logger.exception("Failed to persist guild settings guilds=%s", sorted(pending))
+
+    # --------------------------------------------------------------------------
+    # Method: close
+    # Purpose: Hủy timer và ghi nốt phần còn lại (gọi trước khi đóng DB).
+    # --------------------------------------------------------------------------
+    async def close(self) -> None:
+        task = self._task
+        self._task = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
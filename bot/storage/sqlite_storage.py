@@ -6,9 +6,15 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from itertools import islice
 from typing import Any
 
 import aiosqlite
@@ -22,6 +28,90 @@ from bot.storage.memory import GuildSettings
 MAX_LIKED_PER_USER = 200        # Tối đa bài yêu thích mỗi user/guild
 MAX_PLAYLIST_ITEMS = 500        # Tối đa bài trong mỗi playlist
 DEFAULT_LIKED_TTL_DAYS = 365    # Xóa liked tracks cũ hơn 1 năm
+PRUNE_CHUNK_SIZE = 500          # Số record xóa mỗi transaction khi prune (giữ write lock ngắn)
+VACUUM_PAGES_PER_RUN = 1000     # Số page trả lại OS mỗi lần incremental_vacuum
+READ_POOL_SIZE = 4              # Số connection chỉ-đọc chạy song song với connection ghi
+PLAYLIST_ID_CACHE_SIZE = 256    # Số (guild, owner, name) -> playlist_id giữ trong LRU
+
+# position trong playlist_items là thứ tự thưa (cách nhau _POSITION_GAP), không phải index 1..N:
+# xóa bài chỉ cần DELETE, không phải đánh số lại các bài phía sau.
+# Index hiển thị = thứ tự ORDER BY position.
+_POSITION_GAP = 1024
+
+# Số row mỗi lần fetch khi duyệt cursor của các hàm load_*_all (không fetchall cả bảng).
+_LOAD_CHUNK_SIZE = 256
+
+
+_UPSERT_GUILD_SETTINGS_SQL = """
+INSERT INTO guild_settings (
+  guild_id, volume_default, stay_247, announce_enabled,
+  announce_channel_id, dj_role_id, filters_preset, buttons_enabled
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(guild_id) DO UPDATE SET
+  volume_default=excluded.volume_default,
+  stay_247=excluded.stay_247,
+  announce_enabled=excluded.announce_enabled,
+  announce_channel_id=excluded.announce_channel_id,
+  dj_role_id=excluded.dj_role_id,
+  filters_preset=excluded.filters_preset,
+  buttons_enabled=excluded.buttons_enabled
+"""
+
+
+# PRAGMA cho workload nhiều ghi nhỏ (like, thêm bài playlist).
+# synchronous=NORMAL an toàn với WAL: không mất dữ liệu khi app crash, chỉ có thể mất
+# commit cuối nếu mất điện/OS crash; bỏ được 1 lần fsync mỗi commit.
+_CONNECT_PRAGMAS = """
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-20000;
+PRAGMA mmap_size=268435456;
+PRAGMA wal_autocheckpoint=1000;
+PRAGMA busy_timeout=5000;
+"""
+
+# Cache prepared statement của sqlite3 (theo chuỗi SQL) trên mỗi connection: đủ chỗ cho mọi câu
+# lệnh cố định của module, không phải parse/compile lại SQL mỗi lần gọi.
+_STATEMENT_CACHE_SIZE = 256
+
+# Đếm record tất cả bảng chính trong 1 câu lệnh (1 lượt đi/về thay vì 6).
+_STATS_TABLES = (
+    "guild_settings", "allowed_channels", "command_restrictions",
+    "liked_tracks", "playlists", "playlist_items",
+)
+_DB_STATS_SQL = " UNION ALL ".join(
+    f"SELECT '{table}', COUNT(*) FROM {table}" for table in _STATS_TABLES
+)
+
+
+# ------------------------------------------------------------------------------
+# Helper: _guild_settings_row
+# Purpose: Chuyển GuildSettings thành tuple tham số cho _UPSERT_GUILD_SETTINGS_SQL.
+# ------------------------------------------------------------------------------
+def _guild_settings_row(guild_id: int, settings: GuildSettings) -> tuple[Any, ...]:
+    return (
+        guild_id,
+        int(settings.volume_default),
+        1 if settings.stay_247 else 0,
+        1 if settings.announce_enabled else 0,
+        settings.announce_channel_id,
+        settings.dj_role_id,
+        settings.filters_preset,
+        1 if settings.buttons_enabled else 0,
+    )
+
+
+# ------------------------------------------------------------------------------
+# Class: LikedRow
+# Purpose: Thông tin hiển thị của 1 bài yêu thích, đọc từ các cột đã tách sẵn
+#          (không cần parse track_json / dựng Playable).
+# ------------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class LikedRow:
+    identifier: str
+    title: str
+    author: str
+    length_ms: int
 
 
 # ------------------------------------------------------------------------------
@@ -32,41 +122,50 @@ def _now_ts() -> int:
     return int(time.time())
 
 
+# Cặp (key trong "info" của Lavalink, thuộc tính của Playable) cho _track_fallback.
+_FALLBACK_INFO_ATTRS = (
+    ("identifier", "identifier"),
+    ("isSeekable", "is_seekable"),
+    ("author", "author"),
+    ("length", "length"),
+    ("isStream", "is_stream"),
+    ("title", "title"),
+    ("uri", "uri"),
+    ("artworkUrl", "artwork"),
+    ("isrc", "isrc"),
+    ("sourceName", "source"),
+)
+
+
 # ------------------------------------------------------------------------------
 # Helper: _track_fallback
 # Purpose: Tạo dữ liệu giả lập cho track nếu không lấy được raw data chuẩn.
 # ------------------------------------------------------------------------------
 def _track_fallback(track: wavelink.Playable) -> dict[str, Any]:
+    info = {key: getattr(track, attr) for key, attr in _FALLBACK_INFO_ATTRS}
+    info["position"] = 0
     return {
         "encoded": track.encoded,
-        "info": {
-            "identifier": track.identifier,
-            "isSeekable": track.is_seekable,
-            "author": track.author,
-            "length": track.length,
-            "isStream": track.is_stream,
-            "position": 0,
-            "title": track.title,
-            "uri": track.uri,
-            "artworkUrl": track.artwork,
-            "isrc": track.isrc,
-            "sourceName": track.source,
-        },
+        "info": info,
         "pluginInfo": {},
         "userData": dict(track.extras),
     }
 
 
+_JSON_SEPARATORS = (",", ":")
+
+
 # ------------------------------------------------------------------------------
 # Helper: _track_to_json
 # Purpose: Serialize đối tượng Track thành chuỗi JSON để lưu vào DB.
 # ------------------------------------------------------------------------------
 def _track_to_json(track: wavelink.Playable) -> str:
+    # JSON gọn: không khoảng trắng, giữ nguyên UTF-8 (tiêu đề tiếng Việt không bị escape \uXXXX).
     try:
         payload = track.raw_data
-        return json.dumps(payload, ensure_ascii=True)
+        return json.dumps(payload, ensure_ascii=False, separators=_JSON_SEPARATORS)
     except Exception:
-        return json.dumps(_track_fallback(track), ensure_ascii=True)
+        return json.dumps(_track_fallback(track), ensure_ascii=False, separators=_JSON_SEPARATORS)
 
 
 # ------------------------------------------------------------------------------
@@ -83,9 +182,20 @@ def _track_from_json(raw: str) -> wavelink.Playable:
 # Purpose: Cung cấp các phương thức CRUD tương tác với file SQLite.
 # ------------------------------------------------------------------------------
 class SQLiteStorage:
-    def __init__(self, path: str) -> None:
+    def __init__(self, path: str, *, read_pool_size: int = READ_POOL_SIZE) -> None:
         self._path = path
+        # 1 connection ghi duy nhất (SQLite chỉ cho 1 writer) + pool connection chỉ-đọc (WAL).
         self._conn: aiosqlite.Connection | None = None
+        self._write_lock = asyncio.Lock()
+        self._read_pool_size = read_pool_size
+        self._reader_conns: list[aiosqlite.Connection] = []
+        self._idle_readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        # LRU (guild_id, owner_user_id, name) -> playlist_id,
+        # bỏ 1 câu SELECT cho mỗi thao tác playlist.
+        self._pid_cache: OrderedDict[tuple[int, int, str], int] = OrderedDict()
+        # Đếm số bài yêu thích theo (guild_id, user_id):
+        # chỉ chạy _enforce_liked_limit khi vượt giới hạn.
+        self._liked_counts: dict[tuple[int, int], int] = {}
 
     @property
     def path(self) -> str:
@@ -97,6 +207,40 @@ class SQLiteStorage:
             raise RuntimeError("SQLiteStorage is not connected")
         return self._conn
 
+    # --------------------------------------------------------------------------
+    # Method: transaction
+    # Purpose: Mọi lệnh ghi đều đi qua đây: giữ _write_lock, mở transaction riêng trên
+    #          connection ghi, commit 1 lần (rollback nếu lỗi). Không method nào được
+    #          execute/commit trên connection ghi bên ngoài khối này.
+    # --------------------------------------------------------------------------
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        conn = self._require_conn()
+        async with self._write_lock:
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                await conn.rollback()
+                raise
+            await conn.commit()
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        # Mượn 1 connection chỉ-đọc từ pool; không có pool (vd. :memory:) thì dùng connection ghi.
+        # Khi dùng connection ghi thì giữ _write_lock để không đọc giữa transaction() của lệnh khác.
+        if not self._reader_conns:
+            conn = self._require_conn()
+            async with self._write_lock:
+                yield conn
+            return
+
+        conn = await self._idle_readers.get()
+        try:
+            yield conn
+        finally:
+            self._idle_readers.put_nowait(conn)
+
     # --------------------------------------------------------------------------
     # Method: connect
     # Purpose: Mở kết nối và tạo các bảng (Schema) nếu chưa tồn tại.
@@ -108,12 +252,17 @@ class SQLiteStorage:
         if db_dir:
             os.makedirs(db_dir, exist_ok=True)
 
-        self._conn = await aiosqlite.connect(self._path)
+        self._conn = await aiosqlite.connect(self._path, cached_statements=_STATEMENT_CACHE_SIZE)
         self._conn.row_factory = aiosqlite.Row
 
+        # auto_vacuum chỉ có hiệu lực nếu đặt trước khi tạo bảng đầu tiên (DB mới).
+        # DB cũ đang ở NONE giữ nguyên: đổi chế độ cần 1 lần VACUUM toàn bộ.
+        await self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+
         # Tối ưu hiệu năng (WAL mode) và bật ràng buộc khóa ngoại
         await self._conn.execute("PRAGMA journal_mode=WAL")
         await self._conn.execute("PRAGMA foreign_keys=ON")
+        await self._conn.executescript(_CONNECT_PRAGMAS)
 
         # Bảng settings của Guild
         await self._conn.execute(
@@ -206,47 +355,93 @@ class SQLiteStorage:
             """
         )
 
+        # Index cho truy vấn nóng: list_liked / _enforce_liked_limit lọc theo user
+        # và sắp theo created_at, prune_old_liked lọc theo created_at.
+        # playlist_items đã có PK (playlist_id, position).
+        await self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_liked_user_created"
+            " ON liked_tracks(guild_id, user_id, created_at)"
+        )
+        await self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_liked_created_at ON liked_tracks(created_at)"
+        )
+
         await self._conn.commit()
+        await self._load_liked_counts(self._conn)
+
+        # Pool đọc: WAL cho phép đọc song song với writer.
+        # :memory: là DB riêng theo connection nên bỏ qua.
+        if self._path != ":memory:":
+            for _ in range(self._read_pool_size):
+                reader = await aiosqlite.connect(
+                    self._path, cached_statements=_STATEMENT_CACHE_SIZE
+                )
+                reader.row_factory = aiosqlite.Row
+                await reader.execute("PRAGMA query_only=1")
+                await reader.executescript(_CONNECT_PRAGMAS)
+                self._reader_conns.append(reader)
+                self._idle_readers.put_nowait(reader)
 
     async def close(self) -> None:
+        readers, self._reader_conns = self._reader_conns, []
+        self._idle_readers = asyncio.Queue()
+        for reader in readers:
+            await reader.close()
+
         if self._conn is None:
             return
-        await self._conn.close()
-        self._conn = None
+        # Chờ transaction() đang chạy (lệnh ghi, prune/vacuum nền) xong rồi mới đóng connection ghi.
+        async with self._write_lock:
+            if self._conn is None:
+                return
+            await self._conn.close()
+            self._conn = None
 
     # --------------------------------------------------------------------------
     # Group: DB Maintenance - Tối ưu và dọn dẹp database
     # --------------------------------------------------------------------------
-    async def vacuum(self) -> None:
-        # Thu gọn database, giải phóng dung lượng từ các record đã xóa.
-        conn = self._require_conn()
-        # VACUUM không chạy được trong transaction, cần isolation_level=None
-        await conn.execute("VACUUM")
+    async def vacuum(self, pages: int = VACUUM_PAGES_PER_RUN) -> None:
+        # Trả lại tối đa `pages` page trống cho OS (auto_vacuum=INCREMENTAL).
+        # Không dùng VACUUM toàn bộ: khóa cả DB, bot đứng hình vài giây với DB lớn.
+        async with self.transaction() as conn:
+            # PRAGMA không nhận tham số bind -> chèn số nguyên trực tiếp.
+            cur = await conn.execute(f"PRAGMA incremental_vacuum({int(pages)})")
+            await cur.fetchall()
 
     async def get_db_stats(self) -> dict[str, int]:
         # Lấy thống kê số lượng record trong các bảng chính.
-        conn = self._require_conn()
-        stats: dict[str, int] = {}
-
-        for table in ["guild_settings", "allowed_channels", "command_restrictions",
-                      "liked_tracks", "playlists", "playlist_items"]:
-            cur = await conn.execute(f"SELECT COUNT(*) FROM {table}")
-            row = await cur.fetchone()
-            stats[table] = int(row[0]) if row else 0
+        async with self._reader() as conn:
+            cur = await conn.execute(_DB_STATS_SQL)
+            rows = await cur.fetchall()
 
+        stats = dict.fromkeys(_STATS_TABLES, 0)
+        for r in rows:
+            stats[str(r[0])] = int(r[1])
         return stats
 
     async def prune_old_liked(self, max_age_days: int = DEFAULT_LIKED_TTL_DAYS) -> int:
         # Xóa các bài yêu thích cũ hơn max_age_days.
+        # Xóa theo từng lô PRUNE_CHUNK_SIZE, mỗi lô 1 transaction để lệnh ghi khác chen vào được.
         # Trả về số record đã xóa.
-        conn = self._require_conn()
         cutoff = _now_ts() - (max_age_days * 86400)
-        cur = await conn.execute(
-            "DELETE FROM liked_tracks WHERE created_at < ?",
-            (cutoff,),
-        )
-        await conn.commit()
-        return int(cur.rowcount)
+        total = 0
+        while True:
+            async with self.transaction() as conn:
+                cur = await conn.execute(
+                    """
+                    DELETE FROM liked_tracks
+                    WHERE rowid IN (SELECT rowid FROM liked_tracks WHERE created_at < ? LIMIT ?)
+                    """,
+                    (cutoff, PRUNE_CHUNK_SIZE),
+                )
+            total += int(cur.rowcount)
+            if cur.rowcount < PRUNE_CHUNK_SIZE:
+                break
+
+        if total > 0:
+            async with self.transaction() as conn:
+                await self._load_liked_counts(conn)
+        return total
 
     async def cleanup_orphaned_guilds(self, active_guild_ids: set[int]) -> dict[str, int]:
         # Xóa dữ liệu của các guild không còn trong bot.
@@ -254,50 +449,58 @@ class SQLiteStorage:
         if not active_guild_ids:
             return {}
 
-        conn = self._require_conn()
         deleted: dict[str, int] = {}
 
-        # Tạo placeholder cho IN clause
-        placeholders = ",".join("?" for _ in active_guild_ids)
-        guild_list = tuple(active_guild_ids)
+        # Cả 5 câu DELETE chung 1 transaction
+        async with self.transaction() as conn:
+            # Nạp guild đang hoạt động vào bảng tạm 1 lần
+            # (thay vì IN (?,?,...) N tham số cho mỗi bảng).
+            await conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS _active_guilds (guild_id INTEGER PRIMARY KEY)"
+            )
+            await conn.execute("DELETE FROM _active_guilds")
+            await conn.executemany(
+                "INSERT OR IGNORE INTO _active_guilds (guild_id) VALUES (?)",
+                [(guild_id,) for guild_id in active_guild_ids],
+            )
+
+            # Xóa từ các bảng có guild_id
+            tables = ["guild_settings", "allowed_channels", "command_restrictions", "liked_tracks"]
+            for table in tables:
+                cur = await conn.execute(
+                    f"DELETE FROM {table}"
+                    " WHERE guild_id NOT IN (SELECT guild_id FROM _active_guilds)"
+                )
+                deleted[table] = int(cur.rowcount)
 
-        # Xóa từ các bảng có guild_id
-        tables = ["guild_settings", "allowed_channels", "command_restrictions", "liked_tracks"]
-        for table in tables:
+            # Xóa playlists và playlist_items (cascade) của guild không còn
             cur = await conn.execute(
-                f"DELETE FROM {table} WHERE guild_id NOT IN ({placeholders})",
-                guild_list,
+                "DELETE FROM playlists WHERE guild_id NOT IN (SELECT guild_id FROM _active_guilds)"
             )
-            deleted[table] = int(cur.rowcount)
+            deleted["playlists"] = int(cur.rowcount)
 
-        # Xóa playlists và playlist_items (cascade) của guild không còn
-        cur = await conn.execute(
-            f"DELETE FROM playlists WHERE guild_id NOT IN ({placeholders})",
-            guild_list,
-        )
-        deleted["playlists"] = int(cur.rowcount)
+            await conn.execute("DELETE FROM _active_guilds")
+            await self._load_liked_counts(conn)
 
-        await conn.commit()
+        self._pid_cache.clear()
         return deleted
 
-    async def _enforce_liked_limit(self, guild_id: int, user_id: int) -> int:
-        # Đảm bảo user không vượt quá MAX_LIKED_PER_USER.
-        # Xóa bài cũ nhất nếu vượt quá. Trả về số bài đã xóa.
-        conn = self._require_conn()
-
-        # Đếm số bài hiện có
+    async def _load_liked_counts(self, conn: aiosqlite.Connection) -> None:
+        # Dựng lại bộ đếm liked từ DB (khi connect và sau các lần xóa hàng loạt).
+        # conn là connection ghi đang trong transaction()
+        # để không đọc dữ liệu chưa commit của lệnh khác.
         cur = await conn.execute(
-            "SELECT COUNT(*) FROM liked_tracks WHERE guild_id=? AND user_id=?",
-            (guild_id, user_id),
+            "SELECT guild_id, user_id, COUNT(*) FROM liked_tracks GROUP BY guild_id, user_id"
         )
-        row = await cur.fetchone()
-        count = int(row[0]) if row else 0
-
-        if count <= MAX_LIKED_PER_USER:
-            return 0
+        rows = await cur.fetchall()
+        self._liked_counts = {(int(r[0]), int(r[1])): int(r[2]) for r in rows}
 
-        # Xóa các bài cũ nhất vượt quá giới hạn
-        excess = count - MAX_LIKED_PER_USER
+    async def _enforce_liked_limit(
+        self, conn: aiosqlite.Connection, guild_id: int, user_id: int
+    ) -> int:
+        # Đảm bảo user không vượt quá MAX_LIKED_PER_USER.
+        # Xóa bài cũ nhất nếu vượt quá (1 câu DELETE, LIMIT tự về 0 khi chưa vượt).
+        # Không commit: chạy chung transaction() với câu INSERT của like_track.
         cur = await conn.execute(
             """
             DELETE FROM liked_tracks
@@ -305,385 +508,445 @@ class SQLiteStorage:
                 SELECT rowid FROM liked_tracks
                 WHERE guild_id=? AND user_id=?
                 ORDER BY created_at ASC
-                LIMIT ?
+                LIMIT MAX(0, (SELECT COUNT(*) FROM liked_tracks WHERE guild_id=? AND user_id=?) - ?)
             )
             """,
-            (guild_id, user_id, excess),
+            (guild_id, user_id, guild_id, user_id, MAX_LIKED_PER_USER),
         )
-        await conn.commit()
-        return int(cur.rowcount)
-
-    async def _enforce_playlist_limit(self, playlist_id: int) -> int:
-        # Đảm bảo playlist không vượt quá MAX_PLAYLIST_ITEMS.
-        # Xóa bài cuối nếu vượt quá. Trả về số bài đã xóa.
-        conn = self._require_conn()
-
-        cur = await conn.execute(
-            "SELECT COUNT(*) FROM playlist_items WHERE playlist_id=?",
-            (playlist_id,),
-        )
-        row = await cur.fetchone()
-        count = int(row[0]) if row else 0
-
-        if count <= MAX_PLAYLIST_ITEMS:
-            return 0
-
-        excess = count - MAX_PLAYLIST_ITEMS
-        cur = await conn.execute(
-            """
-            DELETE FROM playlist_items
-            WHERE rowid IN (
-                SELECT rowid FROM playlist_items
-                WHERE playlist_id=?
-                ORDER BY position DESC
-                LIMIT ?
-            )
-            """,
-            (playlist_id, excess),
-        )
-        await conn.commit()
         return int(cur.rowcount)
 
     # --------------------------------------------------------------------------
     # Group: Guild Settings
     # --------------------------------------------------------------------------
     async def load_guild_settings_all(self) -> dict[int, GuildSettings]:
-        conn = self._require_conn()
-        cur = await conn.execute(
-            """
-            SELECT guild_id, volume_default, stay_247, announce_enabled,
-                   announce_channel_id, dj_role_id, filters_preset, buttons_enabled
-            FROM guild_settings
-            """
-        )
-        rows = await cur.fetchall()
-
-        out: dict[int, GuildSettings] = {}
-        for r in rows:
-            guild_id = int(r["guild_id"])
-            out[guild_id] = GuildSettings(
-                volume_default=int(r["volume_default"]),
-                stay_247=bool(int(r["stay_247"])),
-                announce_enabled=bool(int(r["announce_enabled"])),
-                announce_channel_id=int(r["announce_channel_id"]) if r["announce_channel_id"] is not None else None,
-                dj_role_id=int(r["dj_role_id"]) if r["dj_role_id"] is not None else None,
-                filters_preset=str(r["filters_preset"] or "off"),
-                buttons_enabled=bool(int(r["buttons_enabled"])),
+        async with self._reader() as conn:
+            cur = await conn.execute(
+                """
+                SELECT guild_id, volume_default, stay_247, announce_enabled,
+                       announce_channel_id, dj_role_id, filters_preset, buttons_enabled
+                FROM guild_settings
+                """
             )
+            cur.iter_chunk_size = _LOAD_CHUNK_SIZE
+
+            out: dict[int, GuildSettings] = {}
+            async for r in cur:
+                guild_id = int(r["guild_id"])
+                out[guild_id] = GuildSettings(
+                    volume_default=int(r["volume_default"]),
+                    stay_247=bool(int(r["stay_247"])),
+                    announce_enabled=bool(int(r["announce_enabled"])),
+                    announce_channel_id=(
+                        int(r["announce_channel_id"])
+                        if r["announce_channel_id"] is not None
+                        else None
+                    ),
+                    dj_role_id=int(r["dj_role_id"]) if r["dj_role_id"] is not None else None,
+                    filters_preset=str(r["filters_preset"] or "off"),
+                    buttons_enabled=bool(int(r["buttons_enabled"])),
+                )
 
         return out
 
     async def upsert_guild_settings(self, guild_id: int, settings: GuildSettings) -> None:
-        conn = self._require_conn()
-        await conn.execute(
-            """
-            INSERT INTO guild_settings (
-              guild_id, volume_default, stay_247, announce_enabled,
-              announce_channel_id, dj_role_id, filters_preset, buttons_enabled
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET
-              volume_default=excluded.volume_default,
-              stay_247=excluded.stay_247,
-              announce_enabled=excluded.announce_enabled,
-              announce_channel_id=excluded.announce_channel_id,
-              dj_role_id=excluded.dj_role_id,
-              filters_preset=excluded.filters_preset,
-              buttons_enabled=excluded.buttons_enabled
-            """
-            ,
-            (
-                guild_id,
-                int(settings.volume_default),
-                1 if settings.stay_247 else 0,
-                1 if settings.announce_enabled else 0,
-                settings.announce_channel_id,
-                settings.dj_role_id,
-                settings.filters_preset,
-                1 if settings.buttons_enabled else 0,
-            ),
-        )
-        await conn.commit()
+        async with self.transaction() as conn:
+            await conn.execute(_UPSERT_GUILD_SETTINGS_SQL, _guild_settings_row(guild_id, settings))
+
+    async def upsert_many_guild_settings(self, items: Iterable[tuple[int, GuildSettings]]) -> None:
+        # Ghi settings của nhiều guild trong 1 transaction (dùng bởi SettingsWriter).
+        rows = [_guild_settings_row(guild_id, settings) for guild_id, settings in items]
+        async with self.transaction() as conn:
+            await conn.executemany(_UPSERT_GUILD_SETTINGS_SQL, rows)
 
     # --------------------------------------------------------------------------
     # Group: Allowed Channels (Whitelist)
     # --------------------------------------------------------------------------
     async def load_allowed_channels_all(self) -> dict[int, set[int]]:
-        conn = self._require_conn()
-        cur = await conn.execute("SELECT guild_id, channel_id FROM allowed_channels")
-        rows = await cur.fetchall()
+        async with self._reader() as conn:
+            cur = await conn.execute("SELECT guild_id, channel_id FROM allowed_channels")
+            cur.iter_chunk_size = _LOAD_CHUNK_SIZE
 
-        out: dict[int, set[int]] = {}
-        for r in rows:
-            gid = int(r["guild_id"])
-            cid = int(r["channel_id"])
-            out.setdefault(gid, set()).add(cid)
+            out: dict[int, set[int]] = {}
+            async for r in cur:
+                gid = int(r["guild_id"])
+                cid = int(r["channel_id"])
+                out.setdefault(gid, set()).add(cid)
 
         return out
 
     async def add_allowed_channel(self, guild_id: int, channel_id: int) -> None:
-        conn = self._require_conn()
-        await conn.execute(
-            "INSERT OR IGNORE INTO allowed_channels (guild_id, channel_id) VALUES (?, ?)",
-            (guild_id, channel_id),
-        )
-        await conn.commit()
+        async with self.transaction() as conn:
+            await conn.execute(
+                "INSERT OR IGNORE INTO allowed_channels (guild_id, channel_id) VALUES (?, ?)",
+                (guild_id, channel_id),
+            )
 
     async def remove_allowed_channel(self, guild_id: int, channel_id: int) -> None:
-        conn = self._require_conn()
-        await conn.execute(
-            "DELETE FROM allowed_channels WHERE guild_id=? AND channel_id=?",
-            (guild_id, channel_id),
-        )
-        await conn.commit()
+        async with self.transaction() as conn:
+            await conn.execute(
+                "DELETE FROM allowed_channels WHERE guild_id=? AND channel_id=?",
+                (guild_id, channel_id),
+            )
 
     async def clear_allowed_channels(self, guild_id: int) -> None:
-        conn = self._require_conn()
-        await conn.execute("DELETE FROM allowed_channels WHERE guild_id=?", (guild_id,))
-        await conn.commit()
+        async with self.transaction() as conn:
+            await conn.execute("DELETE FROM allowed_channels WHERE guild_id=?", (guild_id,))
 
     # --------------------------------------------------------------------------
     # Group: Command Restrictions
     # --------------------------------------------------------------------------
     async def load_command_restrictions_all(self) -> dict[int, dict[str, int]]:
-        conn = self._require_conn()
-        cur = await conn.execute("SELECT guild_id, command_name, channel_id FROM command_restrictions")
-        rows = await cur.fetchall()
+        async with self._reader() as conn:
+            cur = await conn.execute(
+                "SELECT guild_id, command_name, channel_id FROM command_restrictions"
+            )
+            cur.iter_chunk_size = _LOAD_CHUNK_SIZE
 
-        out: dict[int, dict[str, int]] = {}
-        for r in rows:
-            gid = int(r["guild_id"])
-            cmd = str(r["command_name"])
-            cid = int(r["channel_id"])
-            out.setdefault(gid, {})[cmd] = cid
+            out: dict[int, dict[str, int]] = {}
+            async for r in cur:
+                gid = int(r["guild_id"])
+                cmd = str(r["command_name"])
+                cid = int(r["channel_id"])
+                out.setdefault(gid, {})[cmd] = cid
 
         return out
 
     async def set_command_restriction(self, guild_id: int, command_name: str, channel_id: int) -> None:
-        conn = self._require_conn()
-        await conn.execute(
-            """
-            INSERT INTO command_restrictions (guild_id, command_name, channel_id)
-            VALUES (?, ?, ?)
-            ON CONFLICT(guild_id, command_name) DO UPDATE SET channel_id=excluded.channel_id
-            """,
-            (guild_id, command_name, channel_id),
-        )
-        await conn.commit()
+        async with self.transaction() as conn:
+            await conn.execute(
+                """
+                INSERT INTO command_restrictions (guild_id, command_name, channel_id)
+                VALUES (?, ?, ?)
+                ON CONFLICT(guild_id, command_name) DO UPDATE SET channel_id=excluded.channel_id
+                """,
+                (guild_id, command_name, channel_id),
+            )
 
     async def clear_command_restriction(self, guild_id: int, command_name: str) -> None:
-        conn = self._require_conn()
-        await conn.execute(
-            "DELETE FROM command_restrictions WHERE guild_id=? AND command_name=?",
-            (guild_id, command_name),
-        )
-        await conn.commit()
+        async with self.transaction() as conn:
+            await conn.execute(
+                "DELETE FROM command_restrictions WHERE guild_id=? AND command_name=?",
+                (guild_id, command_name),
+            )
 
     # --------------------------------------------------------------------------
     # Group: Liked Tracks
     # --------------------------------------------------------------------------
     async def like_track(self, guild_id: int, user_id: int, track: wavelink.Playable) -> bool:
-        conn = self._require_conn()
         identifier = track.identifier
         raw = _track_to_json(track)
 
-        cur = await conn.execute(
-            """
-            INSERT OR IGNORE INTO liked_tracks (
-              guild_id, user_id, identifier, title, author, uri, length_ms, source, track_json, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                guild_id,
-                user_id,
-                identifier,
-                track.title,
-                track.author,
-                track.uri,
-                int(track.length),
-                track.source,
-                raw,
-                _now_ts(),
-            ),
-        )
-        await conn.commit()
-
-        # Enforce giới hạn số bài yêu thích
-        if cur.rowcount > 0:
-            await self._enforce_liked_limit(guild_id, user_id)
-
-        return cur.rowcount > 0
+        async with self.transaction() as conn:
+            cur = await conn.execute(
+                """
+                INSERT OR IGNORE INTO liked_tracks (
+                  guild_id, user_id, identifier, title, author, uri, length_ms, source,
+                  track_json, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    guild_id,
+                    user_id,
+                    identifier,
+                    track.title,
+                    track.author,
+                    track.uri,
+                    int(track.length),
+                    track.source,
+                    raw,
+                    _now_ts(),
+                ),
+            )
+            inserted = cur.rowcount > 0
+
+            # Enforce giới hạn số bài yêu thích trong cùng transaction, commit 1 lần.
+            # Chỉ chạy khi bộ đếm vượt MAX_LIKED_PER_USER;
+            # sau khi xóa user còn đúng MAX_LIKED_PER_USER bài.
+            key = (guild_id, user_id)
+            count = self._liked_counts.get(key, 0) + 1
+            if inserted and count > MAX_LIKED_PER_USER:
+                await self._enforce_liked_limit(conn, guild_id, user_id)
+                count = MAX_LIKED_PER_USER
+
+        # Chỉ cập nhật bộ đếm sau khi commit thành công.
+        if inserted:
+            self._liked_counts[key] = count
+        return inserted
 
     async def unlike_track(self, guild_id: int, user_id: int, identifier: str) -> bool:
-        conn = self._require_conn()
-        cur = await conn.execute(
-            "DELETE FROM liked_tracks WHERE guild_id=? AND user_id=? AND identifier=?",
-            (guild_id, user_id, identifier),
-        )
-        await conn.commit()
-        return cur.rowcount > 0
+        async with self.transaction() as conn:
+            cur = await conn.execute(
+                "DELETE FROM liked_tracks WHERE guild_id=? AND user_id=? AND identifier=?",
+                (guild_id, user_id, identifier),
+            )
+        removed = cur.rowcount > 0
+        if removed:
+            key = (guild_id, user_id)
+            count = self._liked_counts.get(key, 0) - 1
+            if count > 0:
+                self._liked_counts[key] = count
+            else:
+                self._liked_counts.pop(key, None)
+        return removed
 
     async def clear_liked(self, guild_id: int, user_id: int) -> int:
-        conn = self._require_conn()
-        cur = await conn.execute(
-            "DELETE FROM liked_tracks WHERE guild_id=? AND user_id=?",
-            (guild_id, user_id),
-        )
-        await conn.commit()
+        async with self.transaction() as conn:
+            cur = await conn.execute(
+                "DELETE FROM liked_tracks WHERE guild_id=? AND user_id=?",
+                (guild_id, user_id),
+            )
+        self._liked_counts.pop((guild_id, user_id), None)
         return int(cur.rowcount)
 
     async def list_liked(self, guild_id: int, user_id: int) -> list[wavelink.Playable]:
-        conn = self._require_conn()
-        cur = await conn.execute(
-            """
-            SELECT track_json FROM liked_tracks
-            WHERE guild_id=? AND user_id=?
-            ORDER BY created_at DESC
-            """,
-            (guild_id, user_id),
-        )
-        rows = await cur.fetchall()
+        async with self._reader() as conn:
+            cur = await conn.execute(
+                """
+                SELECT track_json FROM liked_tracks
+                WHERE guild_id=? AND user_id=?
+                ORDER BY created_at DESC
+                """,
+                (guild_id, user_id),
+            )
+            rows = await cur.fetchall()
         return [_track_from_json(str(r["track_json"])) for r in rows]
 
+    async def list_liked_rows(self, guild_id: int, user_id: int) -> list[LikedRow]:
+        # Như list_liked nhưng chỉ lấy cột hiển thị, dùng cho các lệnh xem danh sách.
+        async with self._reader() as conn:
+            cur = await conn.execute(
+                """
+                SELECT identifier, title, author, length_ms FROM liked_tracks
+                WHERE guild_id=? AND user_id=?
+                ORDER BY created_at DESC
+                """,
+                (guild_id, user_id),
+            )
+            rows = await cur.fetchall()
+        return [
+            LikedRow(
+                identifier=str(r["identifier"]),
+                title=str(r["title"] or ""),
+                author=str(r["author"] or ""),
+                length_ms=int(r["length_ms"] or 0),
+            )
+            for r in rows
+        ]
+
     # --------------------------------------------------------------------------
     # Group: Playlists
     # --------------------------------------------------------------------------
     async def create_playlist(self, guild_id: int, owner_user_id: int, name: str) -> int:
-        conn = self._require_conn()
-        cur = await conn.execute(
-            "INSERT INTO playlists (guild_id, owner_user_id, name, created_at) VALUES (?, ?, ?, ?)",
-            (guild_id, owner_user_id, name, _now_ts()),
-        )
-        await conn.commit()
+        async with self.transaction() as conn:
+            cur = await conn.execute(
+                "INSERT INTO playlists (guild_id, owner_user_id, name, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                (guild_id, owner_user_id, name, _now_ts()),
+            )
         if cur.lastrowid is None:
             raise RuntimeError("Failed to retrieve lastrowid for new playlist")
-        return int(cur.lastrowid)
+        playlist_id = int(cur.lastrowid)
+        self._remember_playlist_id((guild_id, owner_user_id, name), playlist_id)
+        return playlist_id
 
     async def delete_playlist(self, guild_id: int, owner_user_id: int, name: str) -> bool:
-        conn = self._require_conn()
-        cur = await conn.execute(
-            "DELETE FROM playlists WHERE guild_id=? AND owner_user_id=? AND name=?",
-            (guild_id, owner_user_id, name),
-        )
-        await conn.commit()
+        async with self.transaction() as conn:
+            cur = await conn.execute(
+                "DELETE FROM playlists WHERE guild_id=? AND owner_user_id=? AND name=?",
+                (guild_id, owner_user_id, name),
+            )
+        self._pid_cache.pop((guild_id, owner_user_id, name), None)
         return cur.rowcount > 0
 
     async def list_playlists(self, guild_id: int, owner_user_id: int) -> list[tuple[str, int]]:
-        conn = self._require_conn()
-        cur = await conn.execute(
-            """
-            SELECT p.name, COUNT(i.position) AS item_count
-            FROM playlists p
-            LEFT JOIN playlist_items i ON i.playlist_id = p.playlist_id
-            WHERE p.guild_id=? AND p.owner_user_id=?
-            GROUP BY p.playlist_id
-            ORDER BY p.created_at DESC
-            """,
-            (guild_id, owner_user_id),
-        )
-        rows = await cur.fetchall()
+        async with self._reader() as conn:
+            cur = await conn.execute(
+                """
+                SELECT p.name, COUNT(i.position) AS item_count
+                FROM playlists p
+                LEFT JOIN playlist_items i ON i.playlist_id = p.playlist_id
+                WHERE p.guild_id=? AND p.owner_user_id=?
+                GROUP BY p.playlist_id
+                ORDER BY p.created_at DESC
+                """,
+                (guild_id, owner_user_id),
+            )
+            rows = await cur.fetchall()
         return [(str(r["name"]), int(r["item_count"])) for r in rows]
 
-    async def _get_playlist_id(self, guild_id: int, owner_user_id: int, name: str) -> int | None:
-        conn = self._require_conn()
+    async def _get_playlist_id(
+        self,
+        guild_id: int,
+        owner_user_id: int,
+        name: str,
+        *,
+        conn: aiosqlite.Connection,
+    ) -> int | None:
+        # conn: connection đọc từ _reader(), hoặc connection ghi bên trong transaction().
+        key = (guild_id, owner_user_id, name)
+        playlist_id = self._pid_cache.get(key)
+        if playlist_id is not None:
+            self._pid_cache.move_to_end(key)
+            return playlist_id
+
         cur = await conn.execute(
             "SELECT playlist_id FROM playlists WHERE guild_id=? AND owner_user_id=? AND name=?",
-            (guild_id, owner_user_id, name),
+            key,
         )
         row = await cur.fetchone()
         if not row:
             return None
-        return int(row["playlist_id"])
+        playlist_id = int(row["playlist_id"])
+        # Chỉ nhớ kết quả từ connection ghi:
+        # snapshot của reader có thể cũ hơn 1 lần delete_playlist.
+        if conn is self._conn:
+            self._remember_playlist_id(key, playlist_id)
+        return playlist_id
+
+    def _remember_playlist_id(self, key: tuple[int, int, str], playlist_id: int) -> None:
+        self._pid_cache[key] = playlist_id
+        self._pid_cache.move_to_end(key)
+        if len(self._pid_cache) > PLAYLIST_ID_CACHE_SIZE:
+            self._pid_cache.popitem(last=False)
 
     async def playlist_tracks(self, guild_id: int, owner_user_id: int, name: str) -> list[wavelink.Playable] | None:
-        pid = await self._get_playlist_id(guild_id, owner_user_id, name)
-        if pid is None:
-            return None
+        async with self._reader() as conn:
+            pid = await self._get_playlist_id(guild_id, owner_user_id, name, conn=conn)
+            if pid is None:
+                return None
 
-        conn = self._require_conn()
-        cur = await conn.execute(
-            "SELECT track_json FROM playlist_items WHERE playlist_id=? ORDER BY position ASC",
-            (pid,),
-        )
-        rows = await cur.fetchall()
+            cur = await conn.execute(
+                "SELECT track_json FROM playlist_items WHERE playlist_id=? ORDER BY position ASC",
+                (pid,),
+            )
+            rows = await cur.fetchall()
         return [_track_from_json(str(r["track_json"])) for r in rows]
 
     async def add_playlist_track(self, guild_id: int, owner_user_id: int, name: str, track: wavelink.Playable) -> bool:
-        pid = await self._get_playlist_id(guild_id, owner_user_id, name)
-        if pid is None:
-            return False
-
-        conn = self._require_conn()
+        # False nếu không có playlist hoặc playlist đã đạt giới hạn.
+        async with self.transaction() as conn:
+            pid = await self._get_playlist_id(guild_id, owner_user_id, name, conn=conn)
+            if pid is None:
+                return False
+
+            # 1 câu duy nhất: position = MAX+_POSITION_GAP,
+            # WHERE chặn khi đã đạt MAX_PLAYLIST_ITEMS.
+            # Không dùng HAVING không kèm GROUP BY: SQLite < 3.39 báo lỗi cú pháp.
+            cur = await conn.execute(
+                """
+                INSERT INTO playlist_items (
+                  playlist_id, position, identifier, title, author, uri, length_ms, source,
+                  track_json
+                )
+                SELECT ?,
+                       COALESCE(
+                         (SELECT MAX(position) FROM playlist_items WHERE playlist_id=?), 0
+                       ) + ?,
+                       ?, ?, ?, ?, ?, ?, ?
+                WHERE (SELECT COUNT(*) FROM playlist_items WHERE playlist_id=?) < ?
+                """,
+                (
+                    pid,
+                    pid,
+                    _POSITION_GAP,
+                    track.identifier,
+                    track.title,
+                    track.author,
+                    track.uri,
+                    int(track.length),
+                    track.source,
+                    _track_to_json(track),
+                    pid,
+                    MAX_PLAYLIST_ITEMS,
+                ),
+            )
+        return cur.rowcount > 0
 
-        # Kiểm tra giới hạn trước khi thêm
-        cur = await conn.execute(
-            "SELECT COUNT(*) FROM playlist_items WHERE playlist_id=?",
-            (pid,),
-        )
-        row = await cur.fetchone()
-        if row and int(row[0]) >= MAX_PLAYLIST_ITEMS:
-            return False  # Đã đạt giới hạn, không thêm được
+    async def add_playlist_tracks(
+        self,
+        guild_id: int,
+        owner_user_id: int,
+        name: str,
+        tracks: Iterable[wavelink.Playable],
+    ) -> int | None:
+        # Thêm nhiều bài trong 1 transaction
+        # (1 lần đếm, 1 lần MAX(position), executemany, 1 commit).
+        # Trả về số bài đã thêm (cắt theo MAX_PLAYLIST_ITEMS), None nếu không có playlist.
+        async with self.transaction() as conn:
+            pid = await self._get_playlist_id(guild_id, owner_user_id, name, conn=conn)
+            if pid is None:
+                return None
 
-        cur = await conn.execute(
-            "SELECT COALESCE(MAX(position), 0) AS max_pos FROM playlist_items WHERE playlist_id=?",
-            (pid,),
-        )
-        row = await cur.fetchone()
-        next_pos = int(row["max_pos"]) + 1 if row else 1
-
-        await conn.execute(
-            """
-            INSERT INTO playlist_items (
-              playlist_id, position, identifier, title, author, uri, length_ms, source, track_json
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                pid,
-                next_pos,
-                track.identifier,
-                track.title,
-                track.author,
-                track.uri,
-                int(track.length),
-                track.source,
-                _track_to_json(track),
-            ),
-        )
+            cur = await conn.execute(
+                "SELECT COUNT(*) AS n, COALESCE(MAX(position), 0) AS max_pos"
+                " FROM playlist_items WHERE playlist_id=?",
+                (pid,),
+            )
+            row = await cur.fetchone()
+            count = int(row["n"]) if row else 0
+            max_pos = int(row["max_pos"]) if row else 0
+
+            room = MAX_PLAYLIST_ITEMS - count
+            if room <= 0:
+                return 0  # Đã đạt giới hạn, không thêm được
+
+            rows = [
+                (
+                    pid,
+                    max_pos + i * _POSITION_GAP,
+                    track.identifier,
+                    track.title,
+                    track.author,
+                    track.uri,
+                    int(track.length),
+                    track.source,
+                    _track_to_json(track),
+                )
+                for i, track in enumerate(islice(tracks, room), start=1)
+            ]
+            await conn.executemany(
+                """
+                INSERT INTO playlist_items (
+                  playlist_id, position, identifier, title, author, uri, length_ms, source,
+                  track_json
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
 
-        await conn.commit()
-        return True
+        return len(rows)
 
     async def remove_playlist_track(self, guild_id: int, owner_user_id: int, name: str, index: int) -> bool:
-        pid = await self._get_playlist_id(guild_id, owner_user_id, name)
-        if pid is None:
-            return False
-
-        conn = self._require_conn()
         pos = int(index)
         if pos <= 0:
             return False
 
-        cur = await conn.execute(
-            "DELETE FROM playlist_items WHERE playlist_id=? AND position=?",
-            (pid, pos),
-        )
-        if cur.rowcount <= 0:
-            await conn.commit()
-            return False
+        async with self.transaction() as conn:
+            pid = await self._get_playlist_id(guild_id, owner_user_id, name, conn=conn)
+            if pid is None:
+                return False
 
-        # Cập nhật lại thứ tự position cho các item phía sau
-        await conn.execute(
-            "UPDATE playlist_items SET position = position - 1 WHERE playlist_id=? AND position > ?",
-            (pid, pos),
-        )
-        await conn.commit()
-        return True
+            # index (1..) là thứ tự theo position;
+            # position thưa nên không cần đánh số lại sau khi xóa.
+            cur = await conn.execute(
+                """
+                DELETE FROM playlist_items
+                WHERE rowid = (
+                    SELECT rowid FROM playlist_items
+                    WHERE playlist_id=?
+                    ORDER BY position ASC
+                    LIMIT 1 OFFSET ?
+                )
+                """,
+                (pid, pos - 1),
+            )
+        return cur.rowcount > 0
 
     async def clear_playlist(self, guild_id: int, owner_user_id: int, name: str) -> bool:
-        pid = await self._get_playlist_id(guild_id, owner_user_id, name)
-        if pid is None:
-            return False
+        async with self.transaction() as conn:
+            pid = await self._get_playlist_id(guild_id, owner_user_id, name, conn=conn)
+            if pid is None:
+                return False
 
-        conn = self._require_conn()
-        await conn.execute("DELETE FROM playlist_items WHERE playlist_id=?", (pid,))
-        await conn.commit()
+            await conn.execute("DELETE FROM playlist_items WHERE playlist_id=?", (pid,))
         return True
@@ -19,6 +19,8 @@ PLAYER_OP_TIMEOUT = 10            # Timeout cho thao tác player (play/filter)
 
 # Thời gian delay (giây)
 CONTROLLER_REFRESH_DELAY = 0.7    # Delay refresh controller sau track_end
+CONTROLLER_EDIT_DEBOUNCE = 0.25   # Gom các lần bấm nút liên tiếp thành 1 lần edit controller
+DB_MAINTENANCE_INTERVAL = 6 * 3600  # Chu kỳ prune liked cũ + incremental_vacuum chạy nền
 
 # Thời gian seek (mili giây)
 SEEK_STEP_MS = 10_000             # Bước nhảy seek +/- 10s
@@ -39,6 +41,7 @@ MAX_PLAYLIST_ADD = 50             # Số bài tối đa khi thêm từ playlist
 
 # Cache
 PLAYLIST_CACHE_TTL_SECONDS = 300  # Cache playlist trong 5 phút
+PERM_CACHE_TTL_SECONDS = 60      # Cache kết quả kiểm tra quyền DJ/Admin trong 1 phút
 
 
 # ==============================================================================
@@ -9,30 +9,44 @@ from __future__ import annotations
 import asyncio
 import logging
 import time
-from typing import TYPE_CHECKING, Any, cast
+from typing import Any, cast
 
+import aiohttp
 import discord
+import wavelink
 from discord.ext import commands
 
 from bot.utils import constants
 
-if TYPE_CHECKING:
-    import wavelink
-
-
 logger = logging.getLogger(__name__)
 
 
 _LAVALINK_RECONNECT_LOCK = asyncio.Lock()
 _LAST_LAVALINK_RECONNECT_AT = 0.0
 
+# Kết quả "có node CONNECTED" gần nhất được tin trong khoảng ngắn (giây), bỏ quét Pool.nodes
+# mỗi lệnh. Ngắn hơn nhiều so với min_interval_s nên không che mất logic reconnect.
+_LAVALINK_OK_TTL = 1.5
+_LAST_LAVALINK_OK_AT = 0.0
+
+# Được set khi có node Lavalink sẵn sàng (bot gọi notify_lavalink_node_ready từ on_wavelink_node_ready).
+_LAVALINK_NODE_READY = asyncio.Event()
+
+# Lần dò/reconnect Lavalink đang chạy: các caller đến sau chờ chung kết quả thay vì tự chờ riêng.
+_LAVALINK_PROBE_INFLIGHT: asyncio.Future[bool] | None = None
+
+# Rebuild player đang chạy theo guild: {guild_id: future trả về player mới}
+_REBUILD_INFLIGHT: dict[int, asyncio.Future[wavelink.Player | None]] = {}
+
+
+def notify_lavalink_node_ready() -> None:
+    # Đánh thức các caller đang chờ trong ensure_lavalink_connected.
+    _LAVALINK_NODE_READY.set()
+
 
 def is_lavalink_node_error(exc: BaseException) -> bool:
     # Nhận diện nhanh các lỗi transport/node từ Lavalink để kích hoạt fallback.
     # Bao gồm cả LavalinkException (404 player not found, 5xx, v.v.)
-    import aiohttp
-    import wavelink
-
     if isinstance(exc, wavelink.exceptions.NodeException):
         return True
     if isinstance(exc, wavelink.exceptions.LavalinkException):
@@ -66,15 +80,61 @@ async def ensure_lavalink_connected(
     # Input: timeout_s (thời gian chờ reconnect), min_interval_s (chống spam reconnect),
     #        force_reconnect (ép reconnect ngay), bot (để nạp thêm fallback node nếu thiếu).
     # Output: True nếu có node CONNECTED, False nếu chưa sẵn sàng.
+    global _LAVALINK_PROBE_INFLIGHT
+
+    if not force_reconnect and time.monotonic() - _LAST_LAVALINK_OK_AT < _LAVALINK_OK_TTL:
+        return True
+    if _has_connected_node():
+        return True
 
-    import wavelink
+    # force_reconnect luôn tự chạy (cần ép reconnect); còn lại gộp vào lần dò đang chạy (singleflight).
+    if force_reconnect:
+        return await _ensure_lavalink_connected(
+            bot, timeout_s=timeout_s, min_interval_s=min_interval_s, force_reconnect=True
+        )
 
-    def _has_connected_node() -> bool:
-        try:
-            nodes = wavelink.Pool.nodes
-        except Exception:
-            return False
-        return any(n.status is wavelink.NodeStatus.CONNECTED for n in nodes.values())
+    inflight = _LAVALINK_PROBE_INFLIGHT
+    if inflight is None:
+        inflight = asyncio.ensure_future(
+            _ensure_lavalink_connected(
+                bot, timeout_s=timeout_s, min_interval_s=min_interval_s, force_reconnect=False
+            )
+        )
+        _LAVALINK_PROBE_INFLIGHT = inflight
+        inflight.add_done_callback(_clear_lavalink_probe)
+
+    # shield: 1 caller bị cancel không làm hủy lần dò đang dùng chung.
+    return await asyncio.shield(inflight)
+
+
+def _clear_lavalink_probe(fut: asyncio.Future[bool]) -> None:
+    global _LAVALINK_PROBE_INFLIGHT
+    if _LAVALINK_PROBE_INFLIGHT is fut:
+        _LAVALINK_PROBE_INFLIGHT = None
+
+
+def _has_connected_node() -> bool:
+    # Có ít nhất 1 node CONNECTED không; kết quả True được nhớ trong _LAVALINK_OK_TTL giây.
+    global _LAST_LAVALINK_OK_AT
+    try:
+        nodes = wavelink.Pool.nodes
+    except Exception:
+        return False
+    if any(n.status is wavelink.NodeStatus.CONNECTED for n in nodes.values()):
+        _LAST_LAVALINK_OK_AT = time.monotonic()
+        return True
+    return False
+
+
+async def _ensure_lavalink_connected(
+    bot: commands.Bot | None,
+    *,
+    timeout_s: float,
+    min_interval_s: float,
+    force_reconnect: bool,
+) -> bool:
+    # Phần chậm của ensure_lavalink_connected: nạp node thiếu, reconnect rồi chờ node ready.
+    global _LAST_LAVALINK_RECONNECT_AT
 
     async def _connect_missing_nodes_from_config() -> None:
         if bot is None:
@@ -135,12 +195,7 @@ async def ensure_lavalink_connected(
             except Exception:
                 logger.exception("Failed to reconnect existing Lavalink nodes")
 
-    if _has_connected_node():
-        return True
-
     # Thử trigger reconnect (nếu đủ thời gian giữa 2 lần thử), sau đó chờ ngắn để node lên CONNECTED.
-    global _LAST_LAVALINK_RECONNECT_AT
-
     do_reconnect = force_reconnect
     async with _LAVALINK_RECONNECT_LOCK:
         if _has_connected_node():
@@ -161,13 +216,20 @@ async def ensure_lavalink_connected(
         except Exception:
             logger.exception("Failed to reconnect Lavalink pool")
 
+    # Chờ sự kiện node ready thay vì poll: check -> clear -> wait không có await xen giữa,
+    # nên không lỡ sự kiện xảy ra sau lần check.
     deadline = time.monotonic() + max(0.0, timeout_s)
-    while time.monotonic() < deadline:
+    while True:
         if _has_connected_node():
             return True
-        await asyncio.sleep(0.5)
-
-    return _has_connected_node()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        _LAVALINK_NODE_READY.clear()
+        try:
+            await asyncio.wait_for(_LAVALINK_NODE_READY.wait(), timeout=remaining)
+        except asyncio.TimeoutError:
+            return _has_connected_node()
 
 
 # ------------------------------------------------------------------------------
@@ -187,10 +249,13 @@ def as_member(user: discord.abc.User) -> discord.Member | None:
 def author_voice_channel(
     interaction: discord.Interaction,
 ) -> discord.VoiceChannel | discord.StageChannel | None:
-    member = as_member(interaction.user)
-    if member and member.voice and member.voice.channel:
-        return member.voice.channel
-    return None
+    # discord.User (ngoài guild) không có .voice -> getattr trả None.
+    voice = getattr(interaction.user, "voice", None)
+    return voice.channel if voice is not None else None
+
+
+# Administrator hoặc Manage Guild: 1 phép AND trên bitfield thay vì 2 lần đọc flag.
+_ADMIN_PERMS_MASK = discord.Permissions.administrator.flag | discord.Permissions.manage_guild.flag
 
 
 # ------------------------------------------------------------------------------
@@ -198,11 +263,10 @@ def author_voice_channel(
 # Purpose: Kiểm tra user có quyền Administrator hoặc Manage Guild không.
 # ------------------------------------------------------------------------------
 def is_admin(interaction: discord.Interaction) -> bool:
-    member = as_member(interaction.user)
-    if not member:
+    member = interaction.user
+    if not isinstance(member, discord.Member):
         return False
-    perms = member.guild_permissions
-    return perms.administrator or perms.manage_guild
+    return bool(member.guild_permissions.value & _ADMIN_PERMS_MASK)
 
 
 # ------------------------------------------------------------------------------
@@ -211,11 +275,14 @@ def is_admin(interaction: discord.Interaction) -> bool:
 #          Cần truyền bot để lấy guild settings.
 # ------------------------------------------------------------------------------
 def is_dj_or_admin(bot: commands.Bot, interaction: discord.Interaction) -> bool:
-    if is_admin(interaction):
+    # Kiểm tra Member inline (không qua is_admin/as_member) để chỉ kiểm tra kiểu 1 lần.
+    member = interaction.user
+    if not isinstance(member, discord.Member):
+        return False
+    if member.guild_permissions.value & _ADMIN_PERMS_MASK:
         return True
 
-    member = as_member(interaction.user)
-    if not member or not interaction.guild_id:
+    if not interaction.guild_id:
         return False
 
     # Lấy DJ role từ guild settings
@@ -230,7 +297,7 @@ def is_dj_or_admin(bot: commands.Bot, interaction: discord.Interaction) -> bool:
         return True
 
     # Kiểm tra user có DJ role không
-    return any(r.id == dj_role_id for r in member.roles)
+    return member.get_role(dj_role_id) is not None
 
 
 # ------------------------------------------------------------------------------
@@ -242,9 +309,7 @@ async def get_player(
     interaction: discord.Interaction,
     *,
     connect: bool,
-) -> "wavelink.Player | None":
-    import wavelink
-
+) -> wavelink.Player | None:
     guild = interaction.guild
     if not guild:
         return None
@@ -305,10 +370,7 @@ async def get_player(
 
     if config is not None and settings_store is not None:
         settings = settings_store.get(guild.id)
-        player.autoplay = wavelink.AutoPlayMode.partial
-        player.inactive_timeout = config.idle_timeout_seconds
-        if interaction.channel:
-            setattr(player, "home", interaction.channel)
+        _apply_player_defaults(player, interaction, config)
         try:
             await asyncio.wait_for(
                 player.set_volume(settings.volume_default),
@@ -320,31 +382,91 @@ async def get_player(
     return player
 
 
+# ------------------------------------------------------------------------------
+# Helper: _apply_player_defaults
+# Purpose: Thiết lập player vừa connect (autoplay, inactive_timeout, home, queue mode).
+#          Dùng chung cho get_player và rebuild; rebuild truyền lại giá trị của player cũ.
+# ------------------------------------------------------------------------------
+def _apply_player_defaults(
+    player: wavelink.Player,
+    interaction: discord.Interaction,
+    config: Any,
+    *,
+    autoplay: wavelink.AutoPlayMode | None = None,
+    queue_mode: wavelink.QueueMode | None = None,
+) -> None:
+    player.autoplay = autoplay if autoplay is not None else wavelink.AutoPlayMode.partial
+    if config is not None:
+        player.inactive_timeout = config.idle_timeout_seconds
+    if interaction.channel:
+        player.home = interaction.channel  # type: ignore[attr-defined]
+    if queue_mode is not None:
+        player.queue.mode = queue_mode
+
+
+# ------------------------------------------------------------------------------
+# Helper: rebuild_player_session
+# Purpose: Dựng lại player (disconnect + connect + khôi phục queue/track).
+#          Nhiều interaction cùng lúc trên 1 guild chỉ rebuild 1 lần (singleflight),
+#          các caller còn lại chờ và nhận chung player mới.
+# ------------------------------------------------------------------------------
 async def rebuild_player_session(
     bot: commands.Bot,
     interaction: discord.Interaction,
     *,
     channel: discord.VoiceChannel | discord.StageChannel | None = None,
-    old: "wavelink.Player | None" = None,
+    old: wavelink.Player | None = None,
     start_if_idle: bool = True,
-) -> "wavelink.Player | None":
-    import wavelink
-
+) -> wavelink.Player | None:
     guild = interaction.guild
     if not guild:
         return None
 
-    if old is None:
-        vc = guild.voice_client
-        old = vc if isinstance(vc, wavelink.Player) else None
+    # old đã bị thay bởi lần rebuild trước (caller giữ player cũ trong lúc chờ guild_lock).
+    current_vc = guild.voice_client
+    if old is not None and isinstance(current_vc, wavelink.Player) and current_vc is not old:
+        return current_vc
+
+    # Caller không truyền old: lấy player hiện tại ngay đây (đã đọc voice_client ở trên),
+    # _rebuild_player_session không đọc lại nên không nhận nhầm object đổi giữa chừng.
+    if old is None and isinstance(current_vc, wavelink.Player):
+        old = current_vc
+
+    inflight = _REBUILD_INFLIGHT.get(guild.id)
+    if inflight is None:
+        inflight = asyncio.ensure_future(
+            _rebuild_player_session(
+                bot,
+                interaction,
+                channel=channel,
+                old=old,
+                start_if_idle=start_if_idle,
+            )
+        )
+        _REBUILD_INFLIGHT[guild.id] = inflight
+        inflight.add_done_callback(lambda _: _REBUILD_INFLIGHT.pop(guild.id, None))
+
+    # shield: 1 caller bị cancel không làm hủy rebuild đang dùng chung.
+    return await asyncio.shield(inflight)
+
+
+async def _rebuild_player_session(
+    bot: commands.Bot,
+    interaction: discord.Interaction,
+    *,
+    channel: discord.VoiceChannel | discord.StageChannel | None,
+    old: wavelink.Player | None,
+    start_if_idle: bool,
+) -> wavelink.Player | None:
+    guild = interaction.guild
+    if not guild:
+        return None
 
     if channel is None:
         if old and old.channel:
             channel = old.channel
         else:
-            member = as_member(interaction.user)
-            if member and member.voice and member.voice.channel:
-                channel = member.voice.channel
+            channel = author_voice_channel(interaction)
 
     if channel is None:
         return None
@@ -392,22 +514,7 @@ async def rebuild_player_session(
     settings_store = getattr(bot, "settings", None)
     settings = settings_store.get(guild.id) if settings_store else None
 
-    player.autoplay = saved_autoplay if saved_autoplay is not None else wavelink.AutoPlayMode.partial
-    if config is not None:
-        player.inactive_timeout = config.idle_timeout_seconds
-    if interaction.channel:
-        setattr(player, "home", interaction.channel)
-
-    if saved_mode is not None:
-        player.queue.mode = saved_mode
-
-    try:
-        if saved_volume is not None:
-            await asyncio.wait_for(player.set_volume(saved_volume), timeout=constants.PLAYER_OP_TIMEOUT)
-        elif settings is not None:
-            await asyncio.wait_for(player.set_volume(settings.volume_default), timeout=constants.PLAYER_OP_TIMEOUT)
-    except Exception:
-        logger.exception("Failed to set volume after rebuild guild=%s", guild.id)
+    _apply_player_defaults(player, interaction, config, autoplay=saved_autoplay, queue_mode=saved_mode)
 
     if saved_queue:
         await player.queue.put_wait(saved_queue)
@@ -415,8 +522,11 @@ async def rebuild_player_session(
     volume = saved_volume
     if volume is None and settings is not None:
         volume = settings.volume_default
-    if volume is None:
-        volume = int(getattr(player, "volume", 100))
+
+    # play(volume=...) đặt volume trong cùng 1 lần update Lavalink; chỉ gọi set_volume riêng
+    # khi không phát được bài nào.
+    played = False
+    play_volume = volume if volume is not None else int(getattr(player, "volume", 100))
 
     if saved_current is not None:
         try:
@@ -424,23 +534,32 @@ async def rebuild_player_session(
                 player.play(
                     saved_current,
                     start=max(0, saved_pos),
-                    volume=volume,
+                    volume=play_volume,
                     paused=saved_paused,
                 ),
                 timeout=constants.PLAYER_OP_TIMEOUT,
             )
+            played = True
         except Exception:
             logger.exception("Failed to resume track after rebuild guild=%s", guild.id)
     elif start_if_idle and player.queue and not player.playing:
         try:
             nxt = player.queue.get()
         except wavelink.QueueEmpty:
-            return player
+            nxt = None
+
+        if nxt is not None:
+            try:
+                await asyncio.wait_for(player.play(nxt, volume=play_volume), timeout=constants.PLAYER_OP_TIMEOUT)
+                played = True
+            except Exception:
+                logger.exception("Failed to play after rebuild guild=%s", guild.id)
 
+    if not played and volume is not None:
         try:
-            await asyncio.wait_for(player.play(nxt, volume=volume), timeout=constants.PLAYER_OP_TIMEOUT)
+            await asyncio.wait_for(player.set_volume(volume), timeout=constants.PLAYER_OP_TIMEOUT)
         except Exception:
-            logger.exception("Failed to play after rebuild guild=%s", guild.id)
+            logger.exception("Failed to set volume after rebuild guild=%s", guild.id)
 
     return player
 
@@ -451,14 +570,14 @@ async def rebuild_player_session(
 #          Trả về True nếu ok, False nếu khác channel.
 # ------------------------------------------------------------------------------
 def ensure_same_channel(
-    interaction: discord.Interaction, player: "wavelink.Player"
+    interaction: discord.Interaction, player: wavelink.Player
 ) -> bool:
-    user_vc = author_voice_channel(interaction)
-    if not user_vc:
-        return False
-    if not player.channel:
+    voice = getattr(interaction.user, "voice", None)
+    user_vc = voice.channel if voice is not None else None
+    if user_vc is None:
         return False
-    return user_vc.id == player.channel.id
+    player_vc = player.channel
+    return player_vc is not None and user_vc.id == player_vc.id
 
 
 # ------------------------------------------------------------------------------
@@ -472,24 +591,8 @@ async def send_response(
     embed: discord.Embed | None = None,
     ephemeral: bool = False,
 ) -> None:
-    kwargs: dict = {"ephemeral": ephemeral}
-    if content:
-        kwargs["content"] = content
-    if embed:
-        kwargs["embed"] = embed
-
+    # Gọi thẳng với đủ tham số (discord.py bỏ qua content/embed = None), không dựng dict kwargs.
     if interaction.response.is_done():
-        await interaction.followup.send(**kwargs)
+        await interaction.followup.send(content=content, embed=embed, ephemeral=ephemeral)
     else:
-        await interaction.response.send_message(**kwargs)
-
-
-# Giữ tên _send để tương thích với code cũ
-async def _send(interaction: discord.Interaction, content: str | None = None, *, embed: discord.Embed | None = None, ephemeral: bool = False) -> None:
-    # Wrapper cho send_response.
-    await send_response(interaction, content, embed=embed, ephemeral=ephemeral)
-
-
-def _author_voice_channel(interaction: discord.Interaction) -> discord.VoiceChannel | discord.StageChannel | None:
-    # Alias cho author_voice_channel để tương thích với code cũ.
-    return author_voice_channel(interaction)
+        await interaction.response.send_message(content=content, embed=embed, ephemeral=ephemeral)
@@ -1,22 +1,51 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+import weakref
 
 
-_LOCKS: dict[int, asyncio.Lock] = {}
+# Giá trị weakref: lock tự bị thu hồi khi không còn coroutine nào giữ/chờ nó,
+# nên guild đã rời bot không để lại lock trong RAM (không cần quét dọn).
+_LOCKS: weakref.WeakValueDictionary[int, asyncio.Lock] = weakref.WeakValueDictionary()
 
 
 def _get_lock(guild_id: int) -> asyncio.Lock:
-    lock = _LOCKS.get(guild_id)
-    if lock is None:
-        lock = asyncio.Lock()
-        _LOCKS[guild_id] = lock
-    return lock
+    # Đường nhanh (guild đã có lock): 1 lần tra dict.
+    try:
+        return _LOCKS[guild_id]
+    except KeyError:
+        lock = _LOCKS[guild_id] = asyncio.Lock()
+        return lock
 
 
 @asynccontextmanager
 async def guild_lock(guild_id: int):
+    # Không có guild (DM, guild_id 0/None): không khóa, tránh mọi DM dùng chung 1 lock key 0.
+    if not guild_id:
+        yield
+        return
+
     lock = _get_lock(guild_id)
     async with lock:
         yield
+
+
+# Không xếp hàng chờ: yield False ngay nếu guild đang có thao tác khác giữ lock.
+@asynccontextmanager
+async def try_guild_lock(guild_id: int) -> AsyncIterator[bool]:
+    if not guild_id:
+        yield True
+        return
+
+    lock = _get_lock(guild_id)
+    if lock.locked():
+        yield False
+        return
+
+    await lock.acquire()
+    try:
+        yield True
+    finally:
+        lock.release()
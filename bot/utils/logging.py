@@ -1,42 +1,106 @@
 from __future__ import annotations
 
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
 import os
+import queue
 
 from bot.config import Config
 
 
+# Listener chạy thread riêng, ghi log ra file/console; event loop chỉ put vào queue.
+_LISTENER: QueueListener | None = None
+
+# Formatter dùng chung cho mọi handler (không có state theo handler nên tạo 1 lần là đủ).
+_FMT = logging.Formatter(
+    fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+
+# Tên level hợp lệ cho LOG_LEVEL (tra dict thay vì getattr trên module logging).
+_LEVELS = {
+    "CRITICAL": logging.CRITICAL,
+    "FATAL": logging.FATAL,
+    "ERROR": logging.ERROR,
+    "WARNING": logging.WARNING,
+    "WARN": logging.WARN,
+    "INFO": logging.INFO,
+    "DEBUG": logging.DEBUG,
+    "NOTSET": logging.NOTSET,
+}
+
+# Logger con của discord.py không bao giờ cần mức DEBUG.
+_NOISY_LOGGERS = ("discord.gateway", "discord.http")
+
+
 def setup_logging(config: Config) -> None:
-    level = getattr(logging, config.log_level.upper(), logging.INFO)
+    global _LISTENER
+
+    # Đã cấu hình rồi thì bỏ qua: không tạo lại thư mục/handler/listener.
+    # Muốn cấu hình lại (VD trong test) thì gọi stop_logging() trước.
+    if _LISTENER is not None:
+        return
+
+    level = _LEVELS.get(config.log_level.upper(), logging.INFO)
 
     root = logging.getLogger()
     root.setLevel(level)
 
-    fmt = logging.Formatter(
-        fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-
     os.makedirs(config.log_dir, exist_ok=True)
-    log_path = os.path.join(config.log_dir, config.log_file)
 
     file_handler = RotatingFileHandler(
-        log_path,
+        config.log_path,
         maxBytes=config.log_max_bytes,
         backupCount=config.log_backup_count,
         encoding="utf-8",
     )
     file_handler.setLevel(level)
-    file_handler.setFormatter(fmt)
+    file_handler.setFormatter(_FMT)
+
+    # Gom record trong RAM rồi ghi file theo lô; ERROR trở lên ghi ngay (giữ log trước khi crash).
+    file_output: logging.Handler = file_handler
+    if config.log_buffer_capacity > 0:
+        file_output = MemoryHandler(
+            config.log_buffer_capacity,
+            flushLevel=logging.ERROR,
+            target=file_handler,
+            flushOnClose=True,
+        )
+        file_output.setLevel(level)
 
     console_handler = logging.StreamHandler()
     console_handler.setLevel(level)
-    console_handler.setFormatter(fmt)
+    console_handler.setFormatter(_FMT)
 
-    root.handlers.clear()
-    root.addHandler(file_handler)
-    root.addHandler(console_handler)
+    # Ghi file (kể cả xoay vòng file) không chạy trên event loop: root chỉ có QueueHandler.
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    root.handlers = [QueueHandler(log_queue)]
+
+    _LISTENER = QueueListener(log_queue, file_output, console_handler, respect_handler_level=True)
+    _LISTENER.start()
 
     logging.getLogger("discord").setLevel(level)
     logging.getLogger("wavelink").setLevel(level)
+
+    # Gateway/HTTP của discord.py spam DEBUG (heartbeat, từng request): giữ tối thiểu INFO để
+    # record DEBUG bị loại ngay ở isEnabledFor, không tạo record/format. WARNING vẫn đi qua.
+    for name in _NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(max(level, logging.INFO))
+
+
+def stop_logging() -> None:
+    # Dừng listener: ghi hết record còn trong queue rồi đóng handler. Gọi khi tắt bot.
+    global _LISTENER
+
+    listener = _LISTENER
+    if listener is None:
+        return
+
+    _LISTENER = None
+    listener.stop()
+    for handler in listener.handlers:
+        # MemoryHandler.close() flush phần đang gom nhưng không đóng file đích.
+        handler.close()
+        target = getattr(handler, "target", None)
+        if target is not None:
+            target.close()
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-import re
 
+# Đơn vị dạng "1h2m3s" -> vị trí trong (h, m, s); phải xuất hiện đúng thứ tự h -> m -> s.
+_HMS_UNITS = {"h": 0, "H": 0, "m": 1, "M": 1, "s": 2, "S": 2}
 
-_HMS_RE = re.compile(r"^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?$", re.IGNORECASE)
+
+def _hms_to_ms(h: int, m: int, s: int) -> int:
+    return ((h * 3600) + (m * 60) + s) * 1000
 
 
 def parse_time_to_ms(value: str) -> int:
@@ -12,45 +15,62 @@ def parse_time_to_ms(value: str) -> int:
         raise ValueError("empty")
 
     if ":" in raw:
-        parts = raw.split(":")
-        if len(parts) == 2:
-            mm, ss = parts
-            h = 0
-            m = int(mm)
-            s = int(ss)
-        elif len(parts) == 3:
-            hh, mm, ss = parts
-            h = int(hh)
-            m = int(mm)
-            s = int(ss)
+        # rsplit tối đa 2 lần: "a:b:c:d" để lại "a:b" ở đầu -> int() fail -> bad format.
+        try:
+            vals = tuple(map(int, raw.rsplit(":", 2)))
+        except ValueError:
+            raise ValueError("bad format") from None
+
+        if len(vals) == 3:
+            h, m, s = vals
         else:
-            raise ValueError("bad format")
+            h = 0
+            m, s = vals
 
-        if m < 0 or s < 0 or s >= 60:
-            raise ValueError("bad time")
-        if h < 0:
+        if h < 0 or m < 0 or not 0 <= s < 60:
             raise ValueError("bad time")
 
-        return ((h * 3600) + (m * 60) + s) * 1000
+        return _hms_to_ms(h, m, s)
+
+    # Số giây thuần: thử int() thẳng thay vì isdigit() rồi int() (2 lượt quét).
+    # int() còn nhận dấu +/- và "_" nên chặn lại để giữ đúng định dạng cũ.
+    try:
+        seconds = int(raw)
+    except ValueError:
+        pass
+    else:
+        if not raw[0].isdecimal() or "_" in raw:
+            raise ValueError("bad format")
+        return seconds * 1000
 
-    if raw.isdigit():
-        return int(raw) * 1000
+    # Quét 1 lượt: "<số><đơn vị>" lặp tối đa 3 lần theo thứ tự h, m, s.
+    parts = [0, 0, 0]
+    last_slot = -1
+    start = 0
+    for i, ch in enumerate(raw):
+        if ch.isdecimal():
+            continue
+        slot = _HMS_UNITS.get(ch)
+        if slot is None or slot <= last_slot or i == start:
+            raise ValueError("bad format")
+        parts[slot] = int(raw[start:i])
+        last_slot = slot
+        start = i + 1
 
-    m = _HMS_RE.match(raw.lower())
-    if not m:
+    if start != len(raw):
         raise ValueError("bad format")
 
-    hh = int(m.group(1) or 0)
-    mm = int(m.group(2) or 0)
-    ss = int(m.group(3) or 0)
-    return ((hh * 3600) + (mm * 60) + ss) * 1000
+    return _hms_to_ms(parts[0], parts[1], parts[2])
 
 
 def format_ms(ms: int) -> str:
-    total = max(0, int(ms // 1000))
-    h, rem = divmod(total, 3600)
-    m, s = divmod(rem, 60)
+    # Ép int 1 lần (phòng khi nhận float) rồi tính thẳng, không tạo tuple như divmod.
+    ms = int(ms)
+    total = ms // 1000 if ms > 0 else 0
+    s = total % 60
+    m = total // 60 % 60
+    h = total // 3600
 
-    if h > 0:
+    if h:
         return f"{h}:{m:02d}:{s:02d}"
     return f"{m}:{s:02d}"
@@ -8,9 +8,14 @@ from __future__ import annotations
 
 import asyncio
 
-from bot.bot import MusicBot
+try:
+    # uvloop là tùy chọn (pip install .[speed]); không có (Windows/PyPy) thì dùng loop mặc định.
+    import uvloop
+except ImportError:
+    uvloop = None
+
 from bot.config import load_config
-from bot.utils.logging import setup_logging
+from bot.utils.logging import setup_logging, stop_logging
 
 
 # ------------------------------------------------------------------------------
@@ -25,12 +30,22 @@ async def main() -> None:
     setup_logging(config)
 
     # 3. Khởi tạo bot với config đã load
+    # Import muộn: bot.bot kéo theo discord.py/wavelink/aiohttp, chỉ cần khi thật sự chạy bot.
+    from bot.bot import MusicBot
+
     bot = MusicBot(config)
     
     # 4. Chạy bot (Context Manager đảm bảo dọn dẹp tài nguyên khi đóng)
-    async with bot:
-        await bot.start(config.discord_token)
+    try:
+        async with bot:
+            await bot.start(config.discord_token)
+    finally:
+        # Ghi nốt log còn trong queue trước khi thoát
+        stop_logging()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
+
 import pytest
 
 import bot.config as config_module
 from bot.config import load_config
 
-_CONFIG_ENV_KEYS = [
+_CONFIG_ENV_KEYS = frozenset({
     "DISCORD_TOKEN",
     "DEV_GUILD_ID",
     "LAVALINK_HOST",
@@ -26,17 +28,28 @@ _CONFIG_ENV_KEYS = [
     "LOG_FILE",
     "LOG_MAX_BYTES",
     "LOG_BACKUP_COUNT",
+    "LOG_BUFFER_CAPACITY",
     "SUPPORT_INVITE_URL",
     "VOTE_URL",
-]
+    "BOT_SKIP_DOTENV",
+})
 
 
-@pytest.fixture(autouse=True)
-def clean_config_env(monkeypatch: pytest.MonkeyPatch) -> None:
+@pytest.fixture(autouse=True, scope="module")
+def clean_config_env() -> Iterator[None]:
     # Test cần độc lập với file .env cục bộ để tránh flake.
-    monkeypatch.setattr(config_module, "load_dotenv", lambda override=False: None)
-    for key in _CONFIG_ENV_KEYS:
-        monkeypatch.delenv(key, raising=False)
+    # Dọn env 1 lần cho cả module; setenv trong từng test được monkeypatch của test đó hoàn tác.
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(config_module, "load_dotenv", lambda override=False: None)
+        for key in _CONFIG_ENV_KEYS:
+            mp.delenv(key, raising=False)
+        yield
+
+
+@pytest.fixture(autouse=True)
+def reset_config_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config_module, "_DOTENV_LOADED", False)
+    monkeypatch.setattr(config_module, "_CACHE", None)
 
 
 def test_load_config_with_primary_node_only(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -68,9 +81,11 @@ def test_load_config_with_primary_and_fallback_nodes(monkeypatch: pytest.MonkeyP
     assert config.primary_lavalink_node.identifier == "primary"
     assert len(config.fallback_lavalink_nodes) == 1
     assert config.fallback_lavalink_nodes[0].identifier == "backup1"
+    assert config.fallback_lavalink_nodes[0].uri == "https://backup.example.com:443"
     assert len(config.lavalink_nodes) == 2
     assert config.lavalink_nodes[0].identifier == "primary"
     assert config.lavalink_nodes[1].identifier == "backup1"
+    assert config.nodes_by_id["backup1"] is config.fallback_lavalink_nodes[0]
 
 
 def test_load_config_reject_duplicate_identifier_between_primary_and_fallback(
@@ -88,6 +103,21 @@ def test_load_config_reject_duplicate_identifier_between_primary_and_fallback(
         load_config()
 
 
+def test_load_config_reject_duplicate_identifier_within_json(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("DISCORD_TOKEN", "token")
+    monkeypatch.setenv(
+        "LAVALINK_NODES_JSON",
+        '[{"identifier":"a","uri":"https://a.example.com","password":"p"},'
+        '{"identifier":"b","uri":"https://b.example.com","password":"p"},'
+        '{"identifier":"a","uri":"https://c.example.com","password":"p"}]',
+    )
+
+    with pytest.raises(ValueError, match="Trùng identifier.*'a'"):
+        load_config()
+
+
 def test_load_config_reject_invalid_secure_value_in_json(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setenv("DISCORD_TOKEN", "token")
     monkeypatch.setenv(
@@ -104,3 +134,55 @@ def test_load_config_requires_at_least_one_lavalink_node(monkeypatch: pytest.Mon
 
     with pytest.raises(ValueError, match="Thiếu cấu hình Lavalink"):
         load_config()
+
+
+def test_load_config_reads_dotenv_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[bool] = []
+    monkeypatch.setattr(config_module, "load_dotenv", lambda override=False: calls.append(override))
+    monkeypatch.setenv("DISCORD_TOKEN", "token")
+    monkeypatch.setenv("LAVALINK_HOST", "localhost")
+    monkeypatch.setenv("LAVALINK_PASSWORD", "password")
+
+    load_config()
+    load_config()
+
+    assert calls == [False]
+
+
+def test_load_config_skips_dotenv_when_requested(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[bool] = []
+    monkeypatch.setattr(config_module, "load_dotenv", lambda override=False: calls.append(override))
+    monkeypatch.setenv("BOT_SKIP_DOTENV", "1")
+    monkeypatch.setenv("DISCORD_TOKEN", "token")
+    monkeypatch.setenv("LAVALINK_HOST", "localhost")
+    monkeypatch.setenv("LAVALINK_PASSWORD", "password")
+
+    load_config()
+
+    assert calls == []
+
+
+def test_load_config_reject_invalid_uri_scheme_in_json(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DISCORD_TOKEN", "token")
+    monkeypatch.setenv(
+        "LAVALINK_NODES_JSON",
+        '[{"identifier":"backup1","uri":"ws://backup.example.com:2333","password":"backup-pass"}]',
+    )
+
+    with pytest.raises(ValueError, match="uri không hợp lệ"):
+        load_config()
+
+
+def test_load_config_returns_cached_until_reload(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DISCORD_TOKEN", "token")
+    monkeypatch.setenv("LAVALINK_HOST", "localhost")
+    monkeypatch.setenv("LAVALINK_PASSWORD", "password")
+
+    first = load_config()
+    monkeypatch.setenv("DEFAULT_VOLUME", "80")
+
+    assert load_config() is first
+    reloaded = load_config(reload=True)
+    assert reloaded is not first
+    assert reloaded.default_volume == 80
+    assert load_config() is reloaded
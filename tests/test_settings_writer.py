@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+
+from bot.storage.memory import GuildSettings
+from bot.storage.settings_writer import SettingsWriter
+
+
+class _BlockingStorage:
+    # Storage giả: lần ghi đầu tiên bị giữ lại tới khi test cho phép chạy tiếp.
+    def __init__(self) -> None:
+        self.batches: list[dict[int, str]] = []
+        self.first_started = asyncio.Event()
+        self.release_first = asyncio.Event()
+
+    async def upsert_many_guild_settings(self, items: Iterable[tuple[int, GuildSettings]]) -> None:
+        batch = {guild_id: settings.filters_preset for guild_id, settings in items}
+        if not self.batches:
+            self.batches.append(batch)
+            self.first_started.set()
+            await self.release_first.wait()
+            return
+        self.batches.append(batch)
+
+
+def test_schedule_during_inflight_flush_is_written() -> None:
+    async def run() -> list[dict[int, str]]:
+        storage = _BlockingStorage()
+        writer = SettingsWriter(storage, delay=0)  # type: ignore[arg-type]
+
+        writer.schedule(1, GuildSettings(volume_default=100, filters_preset="rock"))
+        await asyncio.wait_for(storage.first_started.wait(), timeout=1)
+
+        # Flush đầu đang chờ DB: task vẫn chạy nên schedule() không tạo task mới.
+        writer.schedule(2, GuildSettings(volume_default=100, filters_preset="jazz"))
+        storage.release_first.set()
+
+        # Không gọi close(): guild 2 phải được chính task nền ghi.
+        for _ in range(50):
+            if len(storage.batches) >= 2:
+                break
+            await asyncio.sleep(0)
+        return storage.batches
+
+    assert asyncio.run(run()) == [{1: "rock"}, {2: "jazz"}]
+
+
+def test_write_now_waits_for_inflight_flush_and_keeps_latest() -> None:
+    async def run() -> list[dict[int, str]]:
+        storage = _BlockingStorage()
+        writer = SettingsWriter(storage, delay=0)  # type: ignore[arg-type]
+
+        writer.schedule(1, GuildSettings(volume_default=100, filters_preset="rock"))
+        await asyncio.wait_for(storage.first_started.wait(), timeout=1)
+
+        latest = GuildSettings(volume_default=100, filters_preset="pop")
+        write = asyncio.create_task(writer.write_now(1, latest))
+        await asyncio.sleep(0)
+        assert not write.done()
+
+        storage.release_first.set()
+        await asyncio.wait_for(write, timeout=1)
+        await writer.close()
+        return storage.batches
+
+    assert asyncio.run(run()) == [{1: "rock"}, {1: "pop"}]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import pytest
+import wavelink
+
+import bot.storage.sqlite_storage as sqlite_storage
+from bot.storage.sqlite_storage import SQLiteStorage
+
+
+def _track(i: int) -> wavelink.Playable:
+    return wavelink.Playable(
+        data={
+            "encoded": f"enc{i}",
+            "info": {
+                "identifier": f"id{i}",
+                "isSeekable": True,
+                "author": "author",
+                "length": 1000 * i,
+                "isStream": False,
+                "position": 0,
+                "title": f"title {i}",
+                "uri": f"https://example.com/{i}",
+                "artworkUrl": None,
+                "isrc": None,
+                "sourceName": "youtube",
+            },
+            "pluginInfo": {},
+            "userData": {},
+        }
+    )
+
+
+def _run(tmp_path: Path, body: Callable[[SQLiteStorage], Awaitable[None]]) -> None:
+    # Mỗi test dùng 1 file DB riêng trong tmp_path (có pool reader như khi chạy thật).
+    async def run() -> None:
+        storage = SQLiteStorage(str(tmp_path / "bot.sqlite3"))
+        await storage.connect()
+        try:
+            await body(storage)
+        finally:
+            await storage.close()
+
+    asyncio.run(run())
+
+
+async def _identifiers(storage: SQLiteStorage, name: str = "p") -> list[str] | None:
+    tracks = await storage.playlist_tracks(1, 7, name)
+    return None if tracks is None else [t.identifier for t in tracks]
+
+
+def test_playlist_cap_is_enforced(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(sqlite_storage, "MAX_PLAYLIST_ITEMS", 3)
+
+    async def body(storage: SQLiteStorage) -> None:
+        await storage.create_playlist(1, 7, "p")
+        for i in range(1, 4):
+            assert await storage.add_playlist_track(1, 7, "p", _track(i))
+        assert not await storage.add_playlist_track(1, 7, "p", _track(4))
+        assert await storage.add_playlist_tracks(1, 7, "p", [_track(5)]) == 0
+        assert await _identifiers(storage) == ["id1", "id2", "id3"]
+
+        # Xóa 1 bài thì có chỗ lại; add_playlist_tracks cắt theo số chỗ còn trống.
+        assert await storage.remove_playlist_track(1, 7, "p", 1)
+        assert await storage.add_playlist_tracks(1, 7, "p", [_track(6), _track(7)]) == 1
+        assert await _identifiers(storage) == ["id2", "id3", "id6"]
+
+    _run(tmp_path, body)
+
+
+def test_remove_by_index_after_gaps(tmp_path: Path) -> None:
+    async def body(storage: SQLiteStorage) -> None:
+        await storage.create_playlist(1, 7, "p")
+        assert await storage.add_playlist_tracks(1, 7, "p", [_track(i) for i in range(1, 6)]) == 5
+
+        # Position thưa và có lỗ sau khi xóa: index vẫn là thứ tự hiển thị 1..n.
+        assert await storage.remove_playlist_track(1, 7, "p", 2)
+        assert await storage.remove_playlist_track(1, 7, "p", 3)
+        assert await _identifiers(storage) == ["id1", "id3", "id5"]
+
+        assert await storage.add_playlist_track(1, 7, "p", _track(9))
+        assert await storage.remove_playlist_track(1, 7, "p", 3)
+        assert await _identifiers(storage) == ["id1", "id3", "id9"]
+
+        assert not await storage.remove_playlist_track(1, 7, "p", 4)
+        assert not await storage.remove_playlist_track(1, 7, "p", 0)
+        assert await _identifiers(storage) == ["id1", "id3", "id9"]
+
+    _run(tmp_path, body)
+
+
+def test_missing_playlist(tmp_path: Path) -> None:
+    async def body(storage: SQLiteStorage) -> None:
+        assert await _identifiers(storage, "nope") is None
+        assert not await storage.add_playlist_track(1, 7, "nope", _track(1))
+        assert await storage.add_playlist_tracks(1, 7, "nope", [_track(1)]) is None
+        assert not await storage.remove_playlist_track(1, 7, "nope", 1)
+        assert not await storage.clear_playlist(1, 7, "nope")
+        assert not await storage.delete_playlist(1, 7, "nope")
+
+        # Playlist của user khác không được tính là của mình.
+        await storage.create_playlist(1, 8, "nope")
+        assert await _identifiers(storage, "nope") is None
+
+    _run(tmp_path, body)
+
+
+def test_transaction_rolls_back_on_error(tmp_path: Path) -> None:
+    async def body(storage: SQLiteStorage) -> None:
+        await storage.create_playlist(1, 7, "p")
+        assert await storage.add_playlist_track(1, 7, "p", _track(1))
+
+        with pytest.raises(RuntimeError):
+            async with storage.transaction() as conn:
+                await conn.execute("DELETE FROM playlist_items")
+                await conn.execute(
+                    "INSERT INTO allowed_channels (guild_id, channel_id) VALUES (1, 10)"
+                )
+                raise RuntimeError("boom")
+
+        assert await _identifiers(storage) == ["id1"]
+        assert await storage.load_allowed_channels_all() == {}
+
+        # Lock ghi đã được nhả: lệnh ghi tiếp theo vẫn chạy bình thường.
+        assert await storage.add_playlist_track(1, 7, "p", _track(2))
+        assert await _identifiers(storage) == ["id1", "id2"]
+
+    _run(tmp_path, body)
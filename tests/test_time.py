@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import pytest
+
+from bot.utils.time import parse_time_to_ms
+
+
+# Kết quả của bản parse dùng regex/isdigit trước đây; bản quét 1 lượt phải giữ nguyên.
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        # h/m/s, không phân biệt hoa thường, đơn vị nào cũng có thể bỏ.
+        ("1h2m3s", 3_723_000),
+        ("2H3M4S", 7_384_000),
+        ("1h", 3_600_000),
+        ("90m", 5_400_000),
+        ("45s", 45_000),
+        ("1h30s", 3_630_000),
+        ("0h0m0s", 0),
+        ("007s", 7_000),
+        # Dạng có dấu ":".
+        ("1:30", 90_000),
+        ("1:02:03", 3_723_000),
+        ("0:59", 59_000),
+        ("120:00", 7_200_000),
+        (" 1 : 05 ", 65_000),
+        ("+1:30", 90_000),
+        ("-0:30", 30_000),
+        ("1:3_0", 90_000),
+        # Số giây thuần.
+        ("90", 90_000),
+        (" 10 ", 10_000),
+        ("0", 0),
+        # Chữ số Unicode dạng thập phân (int() và isdigit() đều nhận).
+        ("٣", 3_000),
+        ("١:٣٠", 90_000),
+        ("٢m", 120_000),
+    ],
+)
+def test_parse_time_to_ms_valid(value: str, expected: int) -> None:
+    assert parse_time_to_ms(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "",
+        "   ",
+        # Dấu và "_" chỉ được int() nhận ở dạng ":", số giây thuần thì không.
+        "-5",
+        "+5",
+        "1_0",
+        "1_0s",
+        # Sai thứ tự/lặp đơn vị, thiếu số, ký tự lạ.
+        "1s2m",
+        "1m1h",
+        "1h1h",
+        "h",
+        "m30s",
+        "1h 30m",
+        "1.5",
+        "abc",
+        "10x",
+        # Dạng ":" sai.
+        "1:60",
+        "1:-1",
+        "-1:00:00",
+        "1:-1:00",
+        "1:2:3:4",
+        "1::2",
+        ":30",
+        "1:",
+        # Chữ số Unicode không phải thập phân.
+        "²",
+        "²s",
+    ],
+)
+def test_parse_time_to_ms_invalid(value: str) -> None:
+    with pytest.raises(ValueError):
+        parse_time_to_ms(value)